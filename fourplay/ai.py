@@ -1,46 +1,274 @@
+import math
+import time
+import random
 import unittest
-from typing import Tuple, List, Optional
+import numpy as np
+from typing import Tuple, List, Dict, Iterator, Optional
 
 from fourplay import FourPlay
 
 
 class DepthFirstSearchAI(FourPlay.Player):
 
-    recursion_limit = 8
+    Exact, Lower, Upper = 0, 1, 2
+
+    recursion_limit = 6
+    shuffle = True
+    evaluation = True
+    weights = (1.0, 4.0, 3.0, 0.1)
+
+    def __init__(self, *args, **kwargs):
+        super(DepthFirstSearchAI, self).__init__(*args, **kwargs)
+        self.transpositions = {}
+        self.nodes, self.hits = 0, 0
 
     def play(self) -> FourPlay.Disc:
-        def recursive_best(fourplay: FourPlay, myself: FourPlay.Player, opponent: FourPlay.Player,
-                           myself_best_result: Tuple[int, Optional[FourPlay.Disc]]=(-2, None),
-                           opponent_best_result: Tuple[int, Optional[FourPlay.Disc]]=(+2, None),
-                           recursion_level: int=1):
-            for disc in fourplay.frontier.choices(shuffle=True):
-                fourplay.set(disc, myself)
-                myself_result = (fourplay.score(disc), disc)
-                if myself_result[0] is None:
-                    if recursion_level < self.recursion_limit:
-                        subtree_myself_best_result = (-myself_best_result[0], myself_best_result[1])
-                        subtree_opponent_best_result = (-opponent_best_result[0], opponent_best_result[1])
-                        opponent_result = recursive_best(fourplay, opponent, myself,
-                                                         subtree_opponent_best_result,
-                                                         subtree_myself_best_result,
-                                                         recursion_level + 1)
-                        myself_result = (-opponent_result[0], myself_result[1])
+        best_score, best_column = self.search(self.fourplay.bitboard(self))
+        return self.fourplay.frontier[best_column]
+
+    def choices(self, bitboard: FourPlay.Bitboard) -> List[int]:
+        choices = bitboard.choices()
+        if self.shuffle is True:
+            random.shuffle(choices)
+        else:
+            center = (bitboard.num_columns - 1) / 2
+            choices.sort(key=lambda column: abs(column - center))
+        return choices
+
+    def evaluate(self, bitboard: FourPlay.Bitboard, recursion_limit: int) -> float:
+        if self.evaluation is False:
+            return -1 / recursion_limit
+        threats, connect = bitboard.threats, bitboard.connect
+        two, three, parity, center = self.weights
+        mover = 1 - bitboard.moves % 2
+        value = 0.0
+        for side, sign in [(mover, +1), (1 - mover, -1)]:
+            value += sign * (two * threats.open[side][connect - 2] + three * threats.open[side][connect - 1] +
+                             parity * threats.parities[side][side] + center * threats.center[side])
+        return value / (abs(value) + 10) / recursion_limit
+
+    def search(self, bitboard: FourPlay.Bitboard) -> Tuple[float, Optional[int]]:
+        if self.evaluation is True:
+            bitboard.track()
+        self.transpositions.clear()
+        self.nodes, self.hits = 0, 0
+        return self.negamax(bitboard, -2, +2, 1, self.recursion_limit)
+
+    def analyze(self, bitboard: FourPlay.Bitboard=None,
+                exact: bool=True) -> Iterator[Tuple[int, Dict[int, Tuple[float, int]]]]:
+        if bitboard is None:
+            bitboard = self.fourplay.bitboard(self)
+        if self.evaluation is True:
+            bitboard.track()
+        self.nodes, self.hits = 0, 0
+        for recursion_limit in range(1, self.recursion_limit + 1):
+            self.transpositions.clear()
+            analysis, best_score = {}, -2
+            for column in self.choices(bitboard):
+                flag = self.Exact
+                if bitboard.winning(column):
+                    score = 1
+                else:
+                    bitboard.set(column)
+                    if bitboard.full():
+                        score = 0
+                    elif recursion_limit > 1:
+                        alpha = -2 if exact is True else best_score
+                        score = -self.negamax(bitboard, -2, -alpha, 2, recursion_limit)[0]
+                        if score <= alpha:
+                            flag = self.Upper
                     else:
-                        myself_result = (-1 / self.recursion_limit, myself_result[1])
+                        score = self.evaluate(bitboard, recursion_limit)
+                    bitboard.unset(column)
+                best_score = max(best_score, score)
+                analysis[column] = (score, flag)
+            yield recursion_limit, analysis
+
+    def negamax(self, bitboard: FourPlay.Bitboard, alpha: float, beta: float,
+                recursion_level: int, recursion_limit: int) -> Tuple[float, Optional[int]]:
+        self.nodes += 1
+        key = bitboard.key()
+        if key in self.transpositions:
+            self.hits += 1
+            flag, score = self.transpositions[key]
+            if flag == self.Exact or (flag == self.Lower and score >= beta):
+                return score, None
+            if flag == self.Upper and score <= alpha:
+                return alpha, None
+
+        best_score, best_column = alpha, None
+        for column in self.choices(bitboard):
+            if bitboard.winning(column):
+                score = 1 / recursion_level
+            else:
+                bitboard.set(column)
+                if bitboard.full():
+                    score = 0
+                elif recursion_level < recursion_limit:
+                    score = -self.negamax(bitboard, -beta, -best_score, recursion_level + 1, recursion_limit)[0]
                 else:
-                    myself_result = (myself_result[0] / recursion_level, myself_result[1])
-                fourplay.unset(disc)
+                    score = self.evaluate(bitboard, recursion_limit)
+                bitboard.unset(column)
+
+            if score > best_score:
+                best_score, best_column = score, column
+            if beta <= best_score:
+                break
+
+        if best_score <= alpha:
+            self.transpositions[key] = (self.Upper, best_score)
+        elif best_score >= beta:
+            self.transpositions[key] = (self.Lower, best_score)
+        else:
+            self.transpositions[key] = (self.Exact, best_score)
+        return best_score, best_column
+
+    def reset(self):
+        self.transpositions.clear()
+
+
+class MonteCarloTreeSearchAI(FourPlay.Player):
+
+    class Node:
+        def __init__(self, parent: Optional['MonteCarloTreeSearchAI.Node'], column: Optional[int],
+                     bitboard: FourPlay.Bitboard, outcome: Optional[float]=None):
+            self.parent, self.column = parent, column
+            self.outcome = outcome
+            self.untried = bitboard.choices() if outcome is None else []
+            self.children = {}
+            self.visits, self.wins = 0, 0.0
+            self.amaf_visits, self.amaf_wins = 0, 0.0
+
+        def value(self, parent_visits: int, exploration: float, equivalence: float) -> float:
+            exploitation = self.wins / self.visits
+            if equivalence > 0 and self.amaf_visits > 0:
+                beta = math.sqrt(equivalence / (3 * self.visits + equivalence))
+                exploitation = (1 - beta) * exploitation + beta * self.amaf_wins / self.amaf_visits
+            return exploitation + exploration * math.sqrt(math.log(parent_visits) / self.visits)
+
+    class Playouts:
+        def __init__(self, num_rows: int, num_columns: int, connect: int=4):
+            self.num_rows, self.num_columns, self.connect = num_rows, num_columns, connect
+            num_cells = num_rows * num_columns
+            cell_windows = [[] for cell in range(num_cells)]
+            for row in range(num_rows):
+                for column in range(num_columns):
+                    for diff_row, diff_col in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                        end_row, end_col = row + (connect - 1) * diff_row, column + (connect - 1) * diff_col
+                        if not (0 <= end_row < num_rows and 0 <= end_col < num_columns):
+                            continue
+                        window = [(row + i * diff_row) * num_columns + column + i * diff_col for i in range(connect)]
+                        for cell in window:
+                            cell_windows[cell].append(window)
+            max_windows = max(len(windows) for windows in cell_windows)
+            sentinel = [num_cells] * connect
+            self.windows = np.array([windows + [sentinel] * (max_windows - len(windows))
+                                     for windows in cell_windows], dtype=np.intp)
 
-                if myself_result[0] > myself_best_result[0]:
-                    myself_best_result = myself_result
-                if opponent_best_result[0] <= myself_best_result[0]:
+        def run(self, bitboard: FourPlay.Bitboard, batch: int) -> Tuple[np.ndarray, np.ndarray]:
+            num_rows, num_columns = self.num_rows, self.num_columns
+            board = np.zeros(shape=(batch, num_rows * num_columns + 1), dtype=np.int8)
+            heights = np.zeros(shape=(batch, num_columns), dtype=np.intp)
+            for column in range(num_columns):
+                for row in range(num_rows):
+                    bit = bitboard.bit(row, column)
+                    if bitboard.mask & bit:
+                        board[:, row * num_columns + column] = 1 if bitboard.current & bit else 2
+                        heights[:, column] += 1
+
+            results = np.zeros(shape=batch, dtype=np.int8)
+            played = np.zeros(shape=(batch, 2, num_columns), dtype=bool)
+            active, player = np.arange(batch), 1
+            for move in range(bitboard.moves, num_rows * num_columns):
+                keys = np.random.random(size=(len(active), num_columns))
+                keys[heights[active] >= num_rows] = -1
+                columns = keys.argmax(axis=1)
+                cells = (num_rows - 1 - heights[active, columns]) * num_columns + columns
+                board[active, cells] = player
+                heights[active, columns] += 1
+                played[active, player - 1, columns] = True
+                lines = board[active[:, None, None], self.windows[cells]]
+                won = (lines == player).all(axis=2).any(axis=1)
+                results[active[won]] = +1 if player == 1 else -1
+                active = active[~won]
+                if len(active) == 0:
                     break
+                player = 3 - player
+            return results, played
+
+    exploration = 1.0
+    equivalence = 0
+    batch = 32
+    budget = 1.0
+    iterations = None
+
+    def __init__(self, *args, **kwargs):
+        super(MonteCarloTreeSearchAI, self).__init__(*args, **kwargs)
+        self.playouts = None
+
+    def play(self) -> FourPlay.Disc:
+        root = self.search(self.fourplay.bitboard(self), seconds=self.budget, iterations=self.iterations)
+        best_child = max(root.children.values(), key=lambda child: child.visits)
+        return self.fourplay.frontier[best_child.column]
+
+    def search(self, bitboard: FourPlay.Bitboard, seconds: float=None,
+               iterations: int=None) -> 'MonteCarloTreeSearchAI.Node':
+        if seconds is None and iterations is None:
+            raise ValueError("Monte Carlo tree search needs a time budget or an iteration count")
+        if self.playouts is None or (self.playouts.num_rows, self.playouts.num_columns, self.playouts.connect) != \
+                (bitboard.num_rows, bitboard.num_columns, bitboard.connect):
+            self.playouts = MonteCarloTreeSearchAI.Playouts(bitboard.num_rows, bitboard.num_columns, bitboard.connect)
+        deadline = None if seconds is None else time.perf_counter() + seconds
+        root = MonteCarloTreeSearchAI.Node(None, None, bitboard)
+
+        iteration = 0
+        while iterations is None or iteration < iterations:
+            if deadline is not None and iteration > 0 and time.perf_counter() > deadline:
+                break
+            iteration += 1
+            node, following = root, bitboard.copy()
+            while not node.untried and node.children:
+                node = self.select(node)
+                following.set(node.column)
+            if node.untried:
+                column = node.untried.pop(random.randrange(len(node.untried)))
+                won = following.winning(column)
+                following.set(column)
+                outcome = 1.0 if won else (0.5 if following.full() else None)
+                node.children[column] = MonteCarloTreeSearchAI.Node(node, column, following, outcome)
+                node = node.children[column]
+            self.backpropagate(node, following)
+        return root
+
+    def select(self, node: 'MonteCarloTreeSearchAI.Node') -> 'MonteCarloTreeSearchAI.Node':
+        return max(node.children.values(),
+                   key=lambda child: child.value(node.visits, self.exploration, self.equivalence))
 
-            return myself_best_result
+    def backpropagate(self, node: 'MonteCarloTreeSearchAI.Node', bitboard: FourPlay.Bitboard):
+        if node.outcome is not None:
+            wins = self.batch * node.outcome
+            played_visits = played_wins = np.zeros(shape=(2, bitboard.num_columns))
+        else:
+            results, played = self.playouts.run(bitboard, self.batch)
+            side_values = np.stack([(1 + results) / 2, (1 - results) / 2], axis=1)
+            wins = self.batch - side_values[:, 0].sum()
+            played_visits = played.sum(axis=0).astype(np.double)
+            played_wins = (played * side_values[:, :, None]).sum(axis=0)
 
-        opponent = self.fourplay.x if self == self.fourplay.o else self.fourplay.o
-        best_result, best_disc = recursive_best(self.fourplay, self, opponent)
-        return best_disc
+        side = 1
+        while node is not None:
+            node.visits += self.batch
+            node.wins += wins
+            wins = self.batch - wins
+            parent = node.parent
+            if parent is not None and self.equivalence > 0:
+                played_visits, played_wins = played_visits.copy(), played_wins.copy()
+                played_visits[side, node.column] = self.batch
+                played_wins[side, node.column] = self.batch - wins
+                for column, child in parent.children.items():
+                    child.amaf_visits += played_visits[side, column]
+                    child.amaf_wins += played_wins[side, column]
+            node, side = parent, 1 - side
 
 
 # region Unit Tests
@@ -86,6 +314,29 @@ class TestDepthFirstSearchAI(unittest.TestCase):
             'OXXOXXX']
     }
 
+    Variants = {
+        'EightBySeven': ([
+            '-------',
+            '-------',
+            '-------',
+            '-------',
+            '-------',
+            'X------',
+            'X------',
+            'OOO#---'], 4),
+        'ConnectFive': ([
+            '---------',
+            '---------',
+            '---------',
+            '---------',
+            '---------',
+            '---------',
+            '---------',
+            '---------',
+            'X--------',
+            'OOOO#XXX-'], 5)
+    }
+
     @staticmethod
     def find(scenario: List[str], char: str) -> tuple:
         row_line_with_char = [(row, line) for row, line in enumerate(scenario) if char in line]
@@ -93,8 +344,8 @@ class TestDepthFirstSearchAI(unittest.TestCase):
         row, line = row_line_with_char[0]
         return row, line.find(char)
 
-    def play(self, scenario: List[str], o: FourPlay.Player, x: FourPlay.Player):
-        fourplay = FourPlay.build(scenario, o=o, x=x)
+    def play(self, scenario: List[str], o: FourPlay.Player, x: FourPlay.Player, connect: int=None):
+        fourplay = FourPlay.build(scenario, o=o, x=x, connect=connect)
         disc = x.play()
         correct = self.find(scenario, '#')
         self.assertEqual((disc.row, disc.column), correct)
@@ -108,6 +359,12 @@ class TestDepthFirstSearchAI(unittest.TestCase):
         self.play(self.Situations['DontMessUp'], o=dummy, x=ai)
         self.play(self.Situations['DontF__kUp'], o=dummy, x=ai)
 
+    def test_variants(self):
+        dummy = FourPlay.Player('O')
+        ai = DepthFirstSearchAI('X')
+        for scenario, connect in self.Variants.values():
+            self.play(scenario, o=dummy, x=ai, connect=connect)
+
     def test_ai_vs_ai(self):
         o, x = DepthFirstSearchAI('O'), DepthFirstSearchAI('X')
         fourplay = FourPlay(o, x)
@@ -118,4 +375,125 @@ class TestDepthFirstSearchAI(unittest.TestCase):
         self.assertEqual(score, +1, "AI vs AI game must be always won by the starting player:\n" + str(fourplay))
 
 
+class TestDepthFirstSearchAnalysis(unittest.TestCase):
+
+    def test_analysis(self):
+        dummy = FourPlay.Player('O')
+        ai = DepthFirstSearchAI('X')
+        for name, scenario in TestDepthFirstSearchAI.Situations.items():
+            fourplay = FourPlay.build(scenario, o=dummy, x=ai)
+            bitboard = fourplay.bitboard(ai)
+            depths, analysis = [], None
+            for depth, analysis in ai.analyze(bitboard):
+                depths.append(depth)
+            self.assertEqual(depths, [*range(1, ai.recursion_limit + 1)])
+
+            for column, (score, flag) in analysis.items():
+                self.assertEqual(flag, DepthFirstSearchAI.Exact)
+                if bitboard.winning(column):
+                    self.assertEqual(score, 1, name)
+                    continue
+                bitboard.set(column)
+                ai.transpositions.clear()
+                if not bitboard.full():
+                    self.assertEqual(score, -ai.negamax(bitboard, -2, +2, 2, ai.recursion_limit)[0], name)
+                bitboard.unset(column)
+
+            best_column = max(analysis, key=lambda column: analysis[column][0])
+            self.assertEqual((fourplay.frontier[best_column].row, best_column),
+                             TestDepthFirstSearchAI.find(scenario, '#'), name)
+
+    def test_bounds(self):
+        ai = DepthFirstSearchAI('X')
+        fourplay = FourPlay.build(TestDepthFirstSearchAI.Situations['DontF__kUp'], o=FourPlay.Player('O'), x=ai)
+        exact = [analysis for depth, analysis in ai.analyze(fourplay.bitboard(ai))][-1]
+        bounded = [analysis for depth, analysis in ai.analyze(fourplay.bitboard(ai), exact=False)][-1]
+        for column, (score, flag) in bounded.items():
+            if flag == DepthFirstSearchAI.Exact:
+                self.assertEqual(score, exact[column][0])
+            else:
+                self.assertLessEqual(exact[column][0], score)
+        self.assertEqual(max(bounded.values())[0], max(exact.values())[0])
+
+
+class TestThreats(unittest.TestCase):
+
+    @staticmethod
+    def counters(threats: FourPlay.Threats) -> tuple:
+        return threats.counts, threats.open, threats.parities, threats.center
+
+    def test_incremental(self):
+        for num_rows, num_columns, connect in [(6, 7, 4), (10, 10, 5)]:
+            for game in range(20):
+                bitboard = FourPlay.Bitboard(num_rows, num_columns, connect)
+                bitboard.track()
+                columns = []
+                while not bitboard.full():
+                    column = random.choice(bitboard.choices())
+                    won = bitboard.winning(column)
+                    bitboard.set(column)
+                    columns.append(column)
+                    fresh = bitboard.copy()
+                    fresh.threats = None
+                    self.assertEqual(self.counters(fresh.track()), self.counters(bitboard.threats))
+                    if won:
+                        break
+                while columns:
+                    bitboard.unset(columns.pop())
+                empty = FourPlay.Bitboard(num_rows, num_columns, connect)
+                self.assertEqual(self.counters(empty.track()), self.counters(bitboard.threats))
+
+    def test_evaluation(self):
+        ai = DepthFirstSearchAI('X')
+        bitboard = FourPlay.Bitboard(6, 7)
+        bitboard.track()
+        for column in [3, 0, 2, 0]:
+            bitboard.set(column)
+        bitboard.set(4)
+        self.assertGreater(ai.evaluate(bitboard, ai.recursion_limit), 0)
+        self.assertLess(ai.evaluate(bitboard, ai.recursion_limit), 1 / ai.recursion_limit)
+
+
+class TestMonteCarloTreeSearchAI(TestDepthFirstSearchAI):
+
+    def scenarios(self, ai: MonteCarloTreeSearchAI):
+        dummy = FourPlay.Player('O')
+        ai.budget, ai.iterations = None, 300
+        for situation in self.Situations.values():
+            self.play(situation, o=dummy, x=ai)
+
+    def test_basics(self):
+        self.scenarios(MonteCarloTreeSearchAI('X'))
+
+    def test_variants(self):
+        dummy = FourPlay.Player('O')
+        ai = MonteCarloTreeSearchAI('X')
+        ai.budget, ai.iterations = None, 300
+        for scenario, connect in self.Variants.values():
+            self.play(scenario, o=dummy, x=ai, connect=connect)
+
+    def test_rave(self):
+        ai = MonteCarloTreeSearchAI('X')
+        ai.equivalence = 1000
+        self.scenarios(ai)
+
+    def test_ai_vs_ai(self):
+        o, x = MonteCarloTreeSearchAI('O'), MonteCarloTreeSearchAI('X')
+        o.budget, o.iterations = None, 50
+        x.budget, x.iterations = None, 50
+        fourplay = FourPlay(o, x)
+        score = None
+        while score is None:
+            score = fourplay.round()
+        self.assertIn(score, [-1, 0, +1])
+
+    def test_budget(self):
+        ai = MonteCarloTreeSearchAI('X')
+        bitboard = FourPlay.Bitboard(6, 7)
+        with self.assertRaises(ValueError):
+            ai.search(bitboard)
+        root = ai.search(bitboard, iterations=20)
+        self.assertEqual(root.visits, 20 * ai.batch)
+
+
 # endregion
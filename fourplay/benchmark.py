@@ -0,0 +1,199 @@
+import sys
+import json
+import time
+import argparse
+import unittest
+from typing import Tuple, Dict, List
+
+from fourplay import FourPlay
+from ai import DepthFirstSearchAI
+
+
+class Perft:
+
+    Expected = [1, 7, 49, 343, 2401, 16807, 117649, 823536, 5673234, 39394572]
+
+    def __init__(self, engine: str='bitboard'):
+        self.engine = engine
+        self.nodes, self.hits = 0, 0
+        self.transpositions = {}
+
+    def count(self, depth: int) -> int:
+        self.nodes, self.hits = 0, 0
+        self.transpositions.clear()
+        if self.engine == 'bitboard':
+            return self.count_bitboard(FourPlay.Bitboard(FourPlay.num_rows, FourPlay.num_columns), depth)
+        else:
+            fourplay = FourPlay()
+            return self.count_discs(fourplay, fourplay.o, fourplay.x, depth)
+
+    def count_bitboard(self, bitboard: FourPlay.Bitboard, depth: int) -> int:
+        self.nodes += 1
+        if depth == 0:
+            return 1
+        key = (bitboard.key(), depth)
+        if key in self.transpositions:
+            self.hits += 1
+            return self.transpositions[key]
+        leaves = 0
+        for column in bitboard.choices():
+            if depth == 1:
+                leaves += 1
+                continue
+            if bitboard.winning(column):
+                continue
+            bitboard.set(column)
+            leaves += self.count_bitboard(bitboard, depth - 1)
+            bitboard.unset(column)
+        self.transpositions[key] = leaves
+        return leaves
+
+    def count_discs(self, fourplay: FourPlay, myself: FourPlay.Player, opponent: FourPlay.Player, depth: int) -> int:
+        self.nodes += 1
+        if depth == 0:
+            return 1
+        leaves = 0
+        for disc in fourplay.frontier.choices(shuffle=False):
+            fourplay.set(disc, myself)
+            if depth == 1:
+                leaves += 1
+            elif fourplay.score(disc) != 1:
+                leaves += self.count_discs(fourplay, opponent, myself, depth - 1)
+            fourplay.unset(disc)
+        return leaves
+
+
+class Positions:
+
+    # Positions are sequences of 1-based columns played from the empty board. The expected result is in plies
+    # from the side to move: +n wins with the n-th ply from now on, -n loses on the n-th ply and 0 is a draw.
+    # Begin and middle game positions are decided within Depth plies, end game positions are solved exactly.
+    Depth = 8
+    Groups = {
+        'begin': [
+            ("244723442237", +5), ("376522573777", +5), ("275743377244", +5), ("264321411744", +5),
+            ("325246513614", +7), ("55431576563", +7), ("753667657773", +7), ("24546672461", +7),
+            ("656442314421", +7), ("2446525355", +7),
+        ],
+        'middle': [
+            ("32112367741125713", -4), ("1357232566652265", -6), ("7475263631616336165", -6),
+            ("6161374541137531236", -4), ("71515312464632", +5), ("674263365145351263155", -4),
+            ("361524726275662124315", -6), ("534357173772144335", +5), ("554651437654466534", +5),
+            ("544437531537544", +5),
+        ],
+        'end': [
+            ("24243444126462556633573361173", +9), ("6125742454424726417557511731257", -4),
+            ("1566666132456227755545132272", +11), ("55436776365663452413411241461723", 0),
+            ("317262545224344675331677615213", -12), ("3164417276543116423333224255775", +11),
+            ("737651277442145663342234422533", 0), ("121567211251561433373775667353", +9),
+            ("64431521455453227255733762267", +11), ("4113617571611566534337446754", -10),
+        ],
+    }
+
+    def __init__(self):
+        self.ai = DepthFirstSearchAI('X')
+        self.ai.shuffle = False
+
+    @staticmethod
+    def bitboard(moves: str) -> FourPlay.Bitboard:
+        bitboard = FourPlay.Bitboard(FourPlay.num_rows, FourPlay.num_columns)
+        for move in moves:
+            column = int(move) - 1
+            assert bitboard.playable(column) and not bitboard.winning(column)
+            bitboard.set(column)
+        return bitboard
+
+    def solve(self, moves: str, recursion_limit: int=None) -> Tuple[int, float]:
+        bitboard = self.bitboard(moves)
+        empty = bitboard.num_rows * bitboard.num_columns - bitboard.moves
+        self.ai.recursion_limit = empty if recursion_limit is None else min(recursion_limit, empty)
+        start = time.perf_counter()
+        score, column = self.ai.search(bitboard)
+        seconds = time.perf_counter() - start
+        if score == 0:
+            return 0, seconds
+        plies = round(1 / abs(score))
+        return (+plies if score > 0 else -plies), seconds
+
+
+def run_perft(engine: str, depth: int) -> Dict:
+    perft = Perft(engine)
+    results, nodes, hits, seconds = [], 0, 0, 0.0
+    for ply in range(depth + 1):
+        start = time.perf_counter()
+        leaves = perft.count(ply)
+        elapsed = time.perf_counter() - start
+        expected = Perft.Expected[ply] if ply < len(Perft.Expected) else None
+        results.append({'depth': ply, 'leaves': leaves, 'expected': expected, 'passed': expected in (None, leaves),
+                        'seconds': elapsed})
+        nodes, hits, seconds = nodes + perft.nodes, hits + perft.hits, seconds + elapsed
+    return {'engine': engine, 'depths': results, 'nodes': nodes, 'seconds': seconds,
+            'nodes_per_second': nodes / seconds if seconds > 0 else None,
+            'mean_time': seconds / len(results), 'tt_hit_rate': hits / nodes if nodes > 0 else 0.0,
+            'passed': all(result['passed'] for result in results)}
+
+
+def run_positions(recursion_limit: int, groups: List[str]) -> Dict:
+    positions = Positions()
+    report = {}
+    for group in groups:
+        failed, nodes, hits, seconds = [], 0, 0, 0.0
+        for moves, expected in Positions.Groups[group]:
+            result, elapsed = positions.solve(moves, None if group == 'end' else recursion_limit)
+            nodes, hits, seconds = nodes + positions.ai.nodes, hits + positions.ai.hits, seconds + elapsed
+            if result != expected:
+                failed.append({'moves': moves, 'expected': expected, 'result': result})
+        count = len(Positions.Groups[group])
+        report[group] = {'positions': count, 'failed': failed, 'nodes': nodes, 'seconds': seconds,
+                         'nodes_per_second': nodes / seconds if seconds > 0 else None,
+                         'mean_time': seconds / count, 'tt_hit_rate': hits / nodes if nodes > 0 else 0.0,
+                         'passed': len(failed) == 0}
+    return report
+
+
+def main(arguments: List[str]=None) -> int:
+    parser = argparse.ArgumentParser(description="Fourplay engine and search benchmark")
+    parser.add_argument('--engine', choices=['bitboard', 'discs'], default='bitboard', help="perft move generator")
+    parser.add_argument('--perft-depth', type=int, default=7, help="deepest perft ply")
+    parser.add_argument('--depth', type=int, default=Positions.Depth,
+                        help="search depth for begin and middle game positions")
+    parser.add_argument('--groups', nargs='+', choices=[*Positions.Groups.keys()],
+                        default=[*Positions.Groups.keys()], help="test position groups to solve")
+    parser.add_argument('--output', default=None, help="JSON report file, stdout if omitted")
+    args = parser.parse_args(arguments)
+
+    report = {'python': sys.version.split()[0],
+              'perft': run_perft(args.engine, args.perft_depth),
+              'positions': run_positions(args.depth, args.groups)}
+    report['passed'] = report['perft']['passed'] and all(group['passed'] for group in report['positions'].values())
+
+    text = json.dumps(report, indent=2)
+    if args.output is None:
+        print(text)
+    else:
+        with open(args.output, 'w') as file:
+            file.write(text + "\n")
+    return 0 if report['passed'] else 1
+
+
+# region Unit Tests
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_perft(self):
+        for engine, depth in [('bitboard', 7), ('discs', 5)]:
+            perft = Perft(engine)
+            for ply in range(depth + 1):
+                self.assertEqual(perft.count(ply), Perft.Expected[ply])
+
+    def test_positions(self):
+        report = run_positions(Positions.Depth, ['end'])
+        self.assertEqual(report['end']['failed'], [])
+
+
+# endregion
+
+
+if __name__ == '__main__':
+    sys.exit(main())
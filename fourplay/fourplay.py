@@ -1,3 +1,4 @@
+import copy
 import random
 from typing import Optional, List
 
@@ -8,8 +9,8 @@ class FourPlay(dict):
         def __init__(self, fourplay: 'FourPlay', row: int, column: int):
             self.fourplay = fourplay
             self.row, self.column = row, column
+            self.bit = 1 << (column * (fourplay.num_rows + 1) + fourplay.num_rows - 1 - row)
             self.delegate = None
-            self.player = None
             self.marked = False
             self.rank = 0
 
@@ -22,6 +23,25 @@ class FourPlay(dict):
         def __str__(self):
             return '-' if self.player is None else str(self.player)
 
+        @property
+        def player(self) -> Optional['FourPlay.Player']:
+            if self.fourplay.o_stones & self.bit:
+                return self.fourplay.o
+            if self.fourplay.x_stones & self.bit:
+                return self.fourplay.x
+            return None
+
+        @player.setter
+        def player(self, player: Optional['FourPlay.Player']):
+            self.fourplay.o_stones &= ~self.bit
+            self.fourplay.x_stones &= ~self.bit
+            if player is None:
+                return
+            if player == self.fourplay.o:
+                self.fourplay.o_stones |= self.bit
+            else:
+                self.fourplay.x_stones |= self.bit
+
         def mark(self, notify: bool=False):
             self.marked = True
             self.notify(notify)
@@ -116,10 +136,199 @@ class FourPlay(dict):
         def reset(self):
             pass
 
-    num_rows, num_columns = 6, 7
+    class Bitboard:
+        def __init__(self, num_rows: int, num_columns: int, connect: int=4):
+            self.num_rows, self.num_columns, self.connect = num_rows, num_columns, connect
+            self.height = num_rows + 1
+            self.bottom = sum(1 << (column * self.height) for column in range(num_columns))
+            self.directions = (1, self.height - 1, self.height, self.height + 1)
+            self.current, self.mask, self.moves = 0, 0, 0
+            self.threats = None
 
-    def __init__(self, o: 'FourPlay.Player'=None, x: 'FourPlay.Player'=None):
+        def __str__(self):
+            string = ""
+            for row in range(self.num_rows):
+                for column in range(self.num_columns):
+                    bit = self.bit(row, column)
+                    if self.mask & bit == 0:
+                        string += "-"
+                    else:
+                        string += "@" if self.current & bit else "#"
+                string += "\n"
+            return string
+
+        def copy(self) -> 'FourPlay.Bitboard':
+            bitboard = copy.copy(self)
+            if self.threats is not None:
+                bitboard.threats = self.threats.copy()
+            return bitboard
+
+        def track(self) -> 'FourPlay.Threats':
+            if self.threats is None:
+                self.threats = FourPlay.Threats(self)
+            return self.threats
+
+        def key(self) -> int:
+            return self.current + self.mask
+
+        def bit(self, row: int, column: int) -> int:
+            return 1 << (column * self.height + self.num_rows - 1 - row)
+
+        def column_mask(self, column: int) -> int:
+            return ((1 << self.num_rows) - 1) << (column * self.height)
+
+        def playable(self, column: int) -> bool:
+            return self.mask & (1 << (column * self.height + self.num_rows - 1)) == 0
+
+        def choices(self) -> List[int]:
+            return [column for column in range(self.num_columns) if self.playable(column)]
+
+        def full(self) -> bool:
+            return self.moves == self.num_rows * self.num_columns
+
+        def aligned(self, stones: int) -> bool:
+            for direction in self.directions:
+                runs, length = stones, 1
+                while 2 * length <= self.connect:
+                    runs &= runs >> (length * direction)
+                    length *= 2
+                if length < self.connect:
+                    runs &= runs >> ((self.connect - length) * direction)
+                if runs:
+                    return True
+            return False
+
+        def winning(self, column: int) -> bool:
+            stones = self.current | ((self.mask + (1 << (column * self.height))) & self.column_mask(column))
+            return self.aligned(stones)
+
+        def set(self, column: int):
+            self.current ^= self.mask
+            self.mask |= self.mask + (1 << (column * self.height))
+            if self.threats is not None:
+                top = (self.mask & self.column_mask(column)).bit_length() - 1
+                self.threats.add(top, self.moves % 2, self.mask)
+            self.moves += 1
+
+        def unset(self, column: int):
+            top = (self.mask & self.column_mask(column)).bit_length() - 1
+            self.moves -= 1
+            if self.threats is not None:
+                self.threats.remove(top, self.moves % 2, self.mask)
+            self.mask ^= 1 << top
+            self.current ^= self.mask
+
+    class Threats:
+        Tables = {}
+
+        def __init__(self, bitboard: 'FourPlay.Bitboard'):
+            self.connect, self.height = bitboard.connect, bitboard.height
+            self.windows, self.cell_windows = self.tables(bitboard)
+            self.counts = [[0] * len(self.windows), [0] * len(self.windows)]
+            self.open = [[0] * (self.connect + 1), [0] * (self.connect + 1)]
+            self.parities = [[0, 0], [0, 0]]
+            self.center = [0, 0]
+
+            mover = bitboard.moves % 2
+            stones = [0, 0]
+            stones[mover], stones[1 - mover] = bitboard.current, bitboard.current ^ bitboard.mask
+            for side in (0, 1):
+                for index, windows in enumerate(self.cell_windows):
+                    if stones[side] & (1 << index):
+                        self.center[side] += len(windows)
+                for window, window_mask in enumerate(self.windows):
+                    self.counts[side][window] = bin(stones[side] & window_mask).count("1")
+            for window, window_mask in enumerate(self.windows):
+                for side in (0, 1):
+                    count, opponents = self.counts[side][window], self.counts[1 - side][window]
+                    if count > 0 and opponents == 0:
+                        self.open[side][count] += 1
+                        if count == self.connect - 1:
+                            self.parities[side][self.parity(window_mask & ~bitboard.mask)] += 1
+
+        @classmethod
+        def tables(cls, bitboard: 'FourPlay.Bitboard') -> tuple:
+            geometry = (bitboard.num_rows, bitboard.num_columns, bitboard.connect)
+            if geometry not in cls.Tables:
+                windows = []
+                cell_windows = [[] for index in range(bitboard.num_columns * bitboard.height)]
+                for row in range(bitboard.num_rows):
+                    for column in range(bitboard.num_columns):
+                        for diff_row, diff_col in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                            cells = [(row + i * diff_row, column + i * diff_col) for i in range(bitboard.connect)]
+                            end_row, end_col = cells[-1]
+                            if not (0 <= end_row < bitboard.num_rows and 0 <= end_col < bitboard.num_columns):
+                                continue
+                            window_mask = 0
+                            for cell in cells:
+                                bit = bitboard.bit(*cell)
+                                window_mask |= bit
+                                cell_windows[bit.bit_length() - 1].append(len(windows))
+                            windows.append(window_mask)
+                cls.Tables[geometry] = (windows, cell_windows)
+            return cls.Tables[geometry]
+
+        def copy(self) -> 'FourPlay.Threats':
+            threats = copy.copy(self)
+            threats.counts = [counts[:] for counts in self.counts]
+            threats.open = [open[:] for open in self.open]
+            threats.parities = [parities[:] for parities in self.parities]
+            threats.center = self.center[:]
+            return threats
+
+        def parity(self, bit: int) -> int:
+            return ((bit.bit_length() - 1) % self.height) % 2
+
+        def add(self, index: int, side: int, mask: int):
+            own, opposing = self.counts[side], self.counts[1 - side]
+            for window in self.cell_windows[index]:
+                count, opponents = own[window], opposing[window]
+                own[window] = count + 1
+                if opponents == 0:
+                    if count > 0:
+                        self.open[side][count] -= 1
+                    self.open[side][count + 1] += 1
+                    if count + 1 == self.connect - 1:
+                        self.parities[side][self.parity(self.windows[window] & ~mask)] += 1
+                    elif count + 1 == self.connect:
+                        self.parities[side][self.parity(1 << index)] -= 1
+                elif count == 0:
+                    self.open[1 - side][opponents] -= 1
+                    if opponents == self.connect - 1:
+                        self.parities[1 - side][self.parity(1 << index)] -= 1
+            self.center[side] += len(self.cell_windows[index])
+
+        def remove(self, index: int, side: int, mask: int):
+            own, opposing = self.counts[side], self.counts[1 - side]
+            for window in self.cell_windows[index]:
+                count, opponents = own[window], opposing[window]
+                own[window] = count - 1
+                if opponents == 0:
+                    self.open[side][count] -= 1
+                    if count > 1:
+                        self.open[side][count - 1] += 1
+                    if count == self.connect - 1:
+                        self.parities[side][self.parity(self.windows[window] & ~mask)] -= 1
+                    elif count == self.connect:
+                        self.parities[side][self.parity(1 << index)] += 1
+                elif count == 1:
+                    self.open[1 - side][opponents] += 1
+                    if opponents == self.connect - 1:
+                        self.parities[1 - side][self.parity(1 << index)] += 1
+            self.center[side] -= len(self.cell_windows[index])
+
+    num_rows, num_columns, connect = 6, 7, 4
+
+    def __init__(self, o: 'FourPlay.Player'=None, x: 'FourPlay.Player'=None,
+                 num_rows: int=None, num_columns: int=None, connect: int=None):
         super(FourPlay, self).__init__()
+        if num_rows is not None:
+            self.num_rows = num_rows
+        if num_columns is not None:
+            self.num_columns = num_columns
+        if connect is not None:
+            self.connect = connect
+        self.o_stones, self.x_stones = 0, 0
         if o is None:
             o = FourPlay.Player('O', self)
         if x is None:
@@ -144,8 +353,8 @@ class FourPlay(dict):
         return string
 
     @classmethod
-    def build(cls, scenario: List[str], o: 'FourPlay.Player', x: 'FourPlay.Player') -> 'FourPlay':
-        fourplay = cls(o=o, x=x)
+    def build(cls, scenario: List[str], o: 'FourPlay.Player', x: 'FourPlay.Player', connect: int=None) -> 'FourPlay':
+        fourplay = cls(o=o, x=x, num_rows=len(scenario), num_columns=len(scenario[0]), connect=connect)
         symbol_map = {fourplay.o.symbol: fourplay.o, fourplay.x.symbol: fourplay.x}
         for row, scenario_row in enumerate(scenario):
             for column, symbol in enumerate(scenario_row):
@@ -154,6 +363,13 @@ class FourPlay(dict):
         fourplay.frontier.reset(fourplay)
         return fourplay
 
+    def bitboard(self, player: 'FourPlay.Player') -> 'FourPlay.Bitboard':
+        bitboard = FourPlay.Bitboard(self.num_rows, self.num_columns, self.connect)
+        bitboard.mask = self.o_stones | self.x_stones
+        bitboard.current = self.o_stones if player == self.o else self.x_stones
+        bitboard.moves = bin(bitboard.mask).count("1")
+        return bitboard
+
     def set(self, disc: 'FourPlay.Disc', player: 'FourPlay.Player', notify: bool=False):
         assert disc.player is None
         disc.player = player
@@ -167,12 +383,10 @@ class FourPlay(dict):
         disc.notify(notify)
 
     def score(self, disc: 'FourPlay.Disc') -> Optional[int]:
-        for forward in [(+1, 0), (0, +1), (+1, +1), (+1, -1)]:
-            rearward = -forward[0], -forward[1]
-            connected = disc.crawl(forward, disc.player) + disc.crawl(rearward, disc.player) - 1
-            if connected >= 4:
-                return 1
-        if len(self.frontier.choices()) == 0:
+        bitboard = self.bitboard(disc.player)
+        if bitboard.aligned(bitboard.current):
+            return 1
+        if bitboard.full():
             return 0
         return None
 
@@ -200,7 +414,7 @@ class FourPlay(dict):
         for forward in [(+1, 0), (0, +1), (+1, +1), (+1, -1)]:
             rearward = -forward[0], -forward[1]
             connected = disc.crawl(forward, disc.player) + disc.crawl(rearward, disc.player) - 1
-            if connected >= 4:
+            if connected >= self.connect:
                 disc.crawl(forward, disc.player, True)
                 disc.crawl(rearward, disc.player, True)
                 return True
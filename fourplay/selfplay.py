@@ -0,0 +1,216 @@
+import os
+import sys
+import json
+import random
+import pathlib
+import argparse
+import tempfile
+import unittest
+import multiprocessing
+import numpy as np
+from typing import Iterator, List, Dict, Tuple
+
+from fourplay import FourPlay
+from ai import DepthFirstSearchAI
+
+
+class SelfPlay:
+
+    Manifest = 'manifest.json'
+
+    def __init__(self, directory: pathlib.Path, num_games: int=1000, chunk_size: int=100,
+                 depths: Tuple[int, ...]=(2, 4, 6, 8), epsilons: Tuple[float, ...]=(0.0, 0.05, 0.10),
+                 num_rows: int=FourPlay.num_rows, num_columns: int=FourPlay.num_columns,
+                 connect: int=FourPlay.connect, seed: int=0):
+        self.directory = pathlib.Path(directory)
+        self.num_games, self.chunk_size = num_games, chunk_size
+        self.depths, self.epsilons = tuple(depths), tuple(epsilons)
+        self.num_rows, self.num_columns, self.connect = num_rows, num_columns, connect
+        self.seed = seed
+
+    @property
+    def num_chunks(self) -> int:
+        return (self.num_games + self.chunk_size - 1) // self.chunk_size
+
+    def settings(self) -> Dict:
+        return {'num_games': self.num_games, 'chunk_size': self.chunk_size,
+                'depths': list(self.depths), 'epsilons': list(self.epsilons),
+                'num_rows': self.num_rows, 'num_columns': self.num_columns, 'connect': self.connect,
+                'seed': self.seed}
+
+    def path(self, chunk: int) -> pathlib.Path:
+        return self.directory / f"chunk-{chunk:06d}.npz"
+
+    def pending(self) -> List[int]:
+        return [chunk for chunk in range(self.num_chunks) if not self.path(chunk).exists()]
+
+    def board(self, bitboard: FourPlay.Bitboard) -> np.ndarray:
+        board = np.zeros(shape=(self.num_rows, self.num_columns), dtype=np.int8)
+        for row in range(self.num_rows):
+            for column in range(self.num_columns):
+                bit = bitboard.bit(row, column)
+                if bitboard.mask & bit:
+                    board[row, column] = +1 if bitboard.current & bit else -1
+        return board
+
+    def game(self, ais: List[DepthFirstSearchAI], epsilons: List[float]) -> Dict[str, list]:
+        bitboard = FourPlay.Bitboard(self.num_rows, self.num_columns, self.connect)
+        positions = {'boards': [], 'scores': [], 'columns': [], 'depths': [], 'epsilons': []}
+        result = 0
+        while True:
+            side = bitboard.moves % 2
+            score, column = ais[side].search(bitboard)
+            if random.random() < epsilons[side]:
+                column = random.choice(bitboard.choices())
+            positions['boards'].append(self.board(bitboard))
+            positions['scores'].append(score)
+            positions['columns'].append(column)
+            positions['depths'].append(ais[side].recursion_limit)
+            positions['epsilons'].append(epsilons[side])
+            won = bitboard.winning(column)
+            bitboard.set(column)
+            if won:
+                result = 1
+                break
+            if bitboard.full():
+                break
+
+        num_positions = len(positions['boards'])
+        positions['outcomes'] = [result if (num_positions - 1 - ply) % 2 == 0 else -result
+                                 for ply in range(num_positions)]
+        return positions
+
+    def chunk(self, chunk: int) -> Tuple[int, int]:
+        random.seed(self.seed * 1_000_003 + chunk)
+        ais = [DepthFirstSearchAI('O'), DepthFirstSearchAI('X')]
+        first_game = chunk * self.chunk_size
+        num_games = min(self.chunk_size, self.num_games - first_game)
+        data = {'boards': [], 'scores': [], 'columns': [], 'depths': [], 'epsilons': [], 'outcomes': [],
+                'games': [], 'plies': []}
+        for game in range(first_game, first_game + num_games):
+            epsilons = []
+            for ai in ais:
+                ai.recursion_limit = random.choice(self.depths)
+                epsilons.append(random.choice(self.epsilons))
+            positions = self.game(ais, epsilons)
+            for name, values in positions.items():
+                data[name].extend(values)
+            data['games'].extend([game] * len(positions['boards']))
+            data['plies'].extend(range(len(positions['boards'])))
+
+        path = self.path(chunk)
+        with tempfile.NamedTemporaryFile(dir=self.directory, suffix='.tmp', delete=False) as file:
+            np.savez_compressed(file,
+                                boards=np.array(data['boards'], dtype=np.int8),
+                                scores=np.array(data['scores'], dtype=np.float32),
+                                columns=np.array(data['columns'], dtype=np.int8),
+                                depths=np.array(data['depths'], dtype=np.int8),
+                                epsilons=np.array(data['epsilons'], dtype=np.float32),
+                                outcomes=np.array(data['outcomes'], dtype=np.int8),
+                                games=np.array(data['games'], dtype=np.int32),
+                                plies=np.array(data['plies'], dtype=np.int16))
+        os.replace(file.name, path)
+        return chunk, len(data['boards'])
+
+    def run(self, num_workers: int=None, verbose: bool=False) -> int:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        manifest = self.directory / self.Manifest
+        if manifest.exists():
+            with manifest.open() as file:
+                if json.load(file) != self.settings():
+                    raise ValueError(f"{self.directory} holds a dataset generated with different settings")
+        else:
+            with manifest.open('w') as file:
+                json.dump(self.settings(), file, indent=2)
+        for leftover in self.directory.glob('*.tmp'):
+            leftover.unlink()
+
+        pending = self.pending()
+        if num_workers == 1:
+            return self.collect(map(self.chunk, pending), len(pending), verbose)
+        with multiprocessing.Pool(processes=num_workers) as pool:
+            return self.collect(pool.imap_unordered(self.chunk, pending), len(pending), verbose)
+
+    @staticmethod
+    def collect(chunks: Iterator[Tuple[int, int]], num_chunks: int, verbose: bool) -> int:
+        num_positions = 0
+        for done, (chunk, positions) in enumerate(chunks, start=1):
+            num_positions += positions
+            if verbose:
+                print(f"Chunk {chunk} ({done}/{num_chunks}): {positions} positions", flush=True)
+        return num_positions
+
+    @staticmethod
+    def load(directory: pathlib.Path) -> Iterator[Dict[str, np.ndarray]]:
+        for path in sorted(pathlib.Path(directory).glob('chunk-*.npz')):
+            with np.load(path) as chunk:
+                yield dict(chunk)
+
+
+def main(arguments: List[str]=None) -> int:
+    parser = argparse.ArgumentParser(description="Fourplay AI vs AI self-play dataset generator")
+    parser.add_argument('directory', help="output directory, an existing one is resumed")
+    parser.add_argument('--games', type=int, default=1000, help="total number of games")
+    parser.add_argument('--chunk-size', type=int, default=100, help="games per chunk file")
+    parser.add_argument('--depths', type=int, nargs='+', default=[2, 4, 6, 8], help="AI search depths to pick from")
+    parser.add_argument('--epsilons', type=float, nargs='+', default=[0.0, 0.05, 0.10],
+                        help="probabilities of a random move to pick from")
+    parser.add_argument('--rows', type=int, default=FourPlay.num_rows)
+    parser.add_argument('--columns', type=int, default=FourPlay.num_columns)
+    parser.add_argument('--connect', type=int, default=FourPlay.connect)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help="worker processes, all cores if omitted")
+    args = parser.parse_args(arguments)
+
+    selfplay = SelfPlay(args.directory, args.games, args.chunk_size, args.depths, args.epsilons,
+                        args.rows, args.columns, args.connect, args.seed)
+    num_positions = selfplay.run(args.workers, verbose=True)
+    print(f"Generated {num_positions} positions into {args.directory}")
+    return 0
+
+
+# region Unit Tests
+
+
+class TestSelfPlay(unittest.TestCase):
+
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as directory:
+            selfplay = SelfPlay(directory, num_games=6, chunk_size=2, depths=(1, 2), epsilons=(0.0, 0.5))
+            selfplay.run(num_workers=1)
+            self.assertEqual(selfplay.pending(), [])
+            first = [*SelfPlay.load(directory)]
+            self.assertEqual(len(first), 3)
+
+            selfplay.path(1).unlink()
+            self.assertEqual(selfplay.pending(), [1])
+            selfplay.run(num_workers=2)
+            second = [*SelfPlay.load(directory)]
+            for before, after in zip(first, second):
+                for name in before:
+                    np.testing.assert_array_equal(before[name], after[name])
+
+    def test_outcomes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            SelfPlay(directory, num_games=4, chunk_size=4, depths=(2,)).run(num_workers=1)
+            chunk, = SelfPlay.load(directory)
+            for game in np.unique(chunk['games']):
+                plies = chunk['plies'][chunk['games'] == game]
+                outcomes = chunk['outcomes'][chunk['games'] == game]
+                self.assertEqual(plies.tolist(), [*range(len(plies))])
+                self.assertTrue(np.all(outcomes[:-1] == -outcomes[1:]))
+                boards = chunk['boards'][chunk['games'] == game]
+                self.assertEqual(np.count_nonzero(boards[-1]), len(plies) - 1)
+
+    def test_settings(self):
+        with tempfile.TemporaryDirectory() as directory:
+            SelfPlay(directory, num_games=1, chunk_size=1, depths=(1,)).run(num_workers=1)
+            with self.assertRaises(ValueError):
+                SelfPlay(directory, num_games=2, chunk_size=1, depths=(1,)).run(num_workers=1)
+
+
+# endregion
+
+
+if __name__ == '__main__':
+    sys.exit(main())
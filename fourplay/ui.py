@@ -4,7 +4,7 @@ from PySide2.QtGui import QPainter, QBrush, QPen, QPalette, QPaintEvent
 from PySide2.QtCore import Qt, QPoint, QSize, QEvent
 
 from fourplay import FourPlay
-from ai import DepthFirstSearchAI
+from ai import DepthFirstSearchAI, MonteCarloTreeSearchAI
 
 
 class QFourPlay(QWidget):
@@ -85,21 +85,22 @@ class QFourPlay(QWidget):
         def play(self) -> FourPlay.Disc:
             return self.fourplay.frontier[self.disc.column]
 
-    AIs = {"Depth First Search AI": DepthFirstSearchAI}
+    AIs = {"Depth First Search AI": DepthFirstSearchAI,
+           "Monte Carlo Tree Search AI": MonteCarloTreeSearchAI}
 
-    def __init__(self):
+    def __init__(self, num_rows: int=None, num_columns: int=None, connect: int=None):
         super(QFourPlay, self).__init__()
         self.fourPlay = None
         self.player, self.ai = None, None
-        self.initGame()
+        self.initGame(num_rows, num_columns, connect)
         self.initUI()
         self.show()
 
-    def initGame(self):
+    def initGame(self, num_rows: int=None, num_columns: int=None, connect: int=None):
         self.player = QFourPlay.QPlayer('O')
         ArtificialIntelligence = QFourPlay.AIs["Depth First Search AI"]
         self.ai = ArtificialIntelligence('X')
-        self.fourPlay = FourPlay(o=self.player, x=self.ai)
+        self.fourPlay = FourPlay(o=self.player, x=self.ai, num_rows=num_rows, num_columns=num_columns, connect=connect)
 
     def initUI(self):
         self.setWindowTitle(self.tr("Fourplay"))
@@ -109,7 +110,7 @@ class QFourPlay(QWidget):
         discGridLayout.setSpacing(4)
         aiComboBox = QComboBox(self)
         aiComboBox.addItems([self.tr(ai) for ai in self.AIs])
-        aiComboBox.currentTextChanged.connect(lambda: self.selectAI())
+        aiComboBox.currentTextChanged.connect(self.selectAI)
         layout.addWidget(aiComboBox)
         layout.addLayout(discGridLayout)
 
@@ -136,7 +137,7 @@ class QFourPlay(QWidget):
 
     def selectAI(self, name: str):
         ArtificialIntelligence = QFourPlay.AIs[name]
-        self.ai = ArtificialIntelligence(self.fourPlay, self.ai.symbol)
+        self.ai = ArtificialIntelligence(self.ai.symbol, self.fourPlay)
         self.fourPlay.x = self.ai
 
     def sizeHint(self) -> QSize:
@@ -0,0 +1,290 @@
+import io
+import sys
+import json
+import queue
+import time
+import argparse
+import unittest
+import multiprocessing
+from unittest import mock
+import numpy as np
+from typing import Dict, List, Optional
+
+from life import GameOfLife, GrayScottDiffusion
+from packed import PackedGameOfLife, pack
+from tiled import TiledGameOfLife
+from parallel import ParallelRunner
+from hashlife import HashLife
+from spectral import SpectralGrayScottDiffusion
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# HashLife has an unbounded universe, so it evolves a soup in the middle of the grid and advances Skip generations per
+# tick to use its memoised 2^k steps. Its throughput counts the soup grown by one cell per generation on every side,
+# the light cone it can actually reach, instead of the grid it is drawn into.
+class Skipping:
+
+    Soup = 64
+    Skip = 64
+    Region = 'light-cone'
+
+    def __init__(self, size: tuple, skip: int=Skip):
+        soup = GameOfLife((min(size[0], self.Soup), min(size[1], self.Soup)))
+        corner = ((size[0] - soup.world.shape[0]) // 2, (size[1] - soup.world.shape[1]) // 2)
+        self.hashlife = HashLife.from_world(soup.world, origin=corner)
+        self.display = GameOfLife(size, fill_rate=0.0)
+        self.size, self.skip, self.soup = size, skip, soup.world.shape
+
+    @property
+    def cells(self) -> int:
+        return (self.soup[0] + 2 * self.generation) * (self.soup[1] + 2 * self.generation)
+
+    @property
+    def generation(self) -> int:
+        return self.hashlife.generation
+
+    def advance(self, generations: int):
+        self.hashlife.advance(generations)
+
+    def tick(self):
+        self.hashlife.advance(self.skip)
+
+    @property
+    def world(self) -> np.ndarray:
+        return self.hashlife.to_world(self.size)
+
+    def visualize(self, out: np.ndarray=None) -> np.array:
+        self.display.world[:] = self.world
+        return self.display.visualize(out)
+
+
+Engines = {
+    'dense': ('life', 'uint8', lambda size: GameOfLife(size)),
+    'packed': ('life', 'uint64', lambda size: PackedGameOfLife(size)),
+    'tiled': ('life', 'uint8', lambda size: TiledGameOfLife(size)),
+    'parallel': ('life', 'uint8', lambda size: ParallelRunner(GameOfLife, size)),
+    'hashlife': ('hashlife', 'quadtree', lambda size: Skipping(size)),
+    'gray-scott': ('gray-scott', 'float64', lambda size: GrayScottDiffusion(size)),
+    'gray-scott-fused': ('gray-scott', 'float32', lambda size: GrayScottDiffusion(size, fused=True)),
+    'spectral': ('spectral', 'float64', lambda size: SpectralGrayScottDiffusion(size)),
+}
+References = {'life': ('dense', 0.0), 'hashlife': ('dense', 0.0), 'gray-scott': ('gray-scott', 1e-4)}
+Unchecked = {'spectral': "implicit diffusion with dt=5 follows a different trajectory than the explicit reference"}
+Sizes = [256, 1024, 4096]
+
+
+def peak_rss(children: bool=False) -> Optional[float]:
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    return usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def workers_rss(engine) -> Optional[float]:
+    total = 0.0
+    for worker in getattr(engine, 'workers', []):
+        try:
+            with open(f"/proc/{worker.pid}/status") as file:
+                total += next(int(line.split()[1]) for line in file if line.startswith('VmHWM')) / 1024
+        except (OSError, StopIteration):
+            return None
+    return total
+
+
+def synchronize(engine, reference):
+    target = getattr(engine, 'game', engine)
+    if hasattr(reference, 'u'):
+        target.u[:], target.v[:] = reference.u, reference.v
+    elif hasattr(target, 'words'):
+        target.words[:] = pack(reference.world)
+    elif hasattr(target, 'hashlife'):
+        target.hashlife = HashLife.from_world(reference.world)
+    else:
+        target.world[:] = reference.world
+    if isinstance(target, TiledGameOfLife):
+        target.touch()
+
+
+def check(name: str, size: int, generations: int) -> float:
+    family, dtype, create = Engines[name]
+    reference_name, tolerance = References[family]
+    size = (min(size, 512), min(size, 512))
+    reference, engine = Engines[reference_name][2](size), create(size)
+    try:
+        if family == 'hashlife':
+            margin = generations + 2
+            reference.world[:margin], reference.world[-margin:] = 0, 0
+            reference.world[:, :margin], reference.world[:, -margin:] = 0, 0
+        synchronize(engine, reference)
+        reference.advance(generations)
+        engine.advance(generations)
+        state = getattr(engine, 'game', engine)
+        if family in ('life', 'hashlife'):
+            return float(np.count_nonzero(state.world != reference.world))
+        return float(np.abs(state.v - reference.v).max())
+    finally:
+        if hasattr(engine, 'close'):
+            engine.close()
+
+
+def measure(name: str, size: int, seconds: float=1.0, max_ticks: int=100, generations: int=16) -> Dict:
+    family, dtype, create = Engines[name]
+    engine = create((size, size))
+    try:
+        frame = np.zeros(shape=(size, size), dtype=np.uint8)
+        engine.tick()
+        engine.visualize(out=frame)
+        skip, region = getattr(engine, 'skip', 1), getattr(engine, 'Region', 'grid')
+        ticking, visualizing, ticks, cells = 0.0, 0.0, 0, 0
+        while ticks < max_ticks and (ticks < 3 or ticking + visualizing < seconds):
+            start = time.perf_counter()
+            engine.tick()
+            middle = time.perf_counter()
+            cells += skip * getattr(engine, 'cells', size * size)
+            engine.visualize(out=frame)
+            ticking, visualizing, ticks = ticking + middle - start, visualizing + time.perf_counter() - middle, ticks + 1
+        workers = workers_rss(engine)
+    finally:
+        if hasattr(engine, 'close'):
+            engine.close()
+    if workers is None:
+        workers = peak_rss(children=True)
+    rss = peak_rss()
+    result = {'engine': name, 'family': family, 'dtype': dtype, 'size': size, 'ticks': ticks,
+              'generations_per_tick': skip, 'ms_per_tick': 1000 * ticking / ticks,
+              'region': region, 'cells_per_second': cells / ticking,
+              'visualize_share': visualizing / (ticking + visualizing),
+              'peak_rss_mb': None if rss is None or workers is None else rss + workers,
+              'workers_rss_mb': workers}
+    if family in References:
+        deviation = check(name, size, generations)
+        result['deviation'] = deviation
+        result['matches'] = deviation <= References[family][1]
+    elif family in Unchecked:
+        result['unchecked'] = Unchecked[family]
+    return result
+
+
+def isolated(results: multiprocessing.Queue, arguments: tuple):
+    try:
+        results.put(measure(*arguments))
+    except Exception as exception:
+        results.put({'engine': arguments[0], 'size': arguments[1], 'error': repr(exception)})
+
+
+def spawn(arguments: tuple) -> Dict:
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=isolated, args=(results, arguments))
+    process.start()
+    while True:
+        try:
+            result = results.get(timeout=1.0)
+            break
+        except queue.Empty:
+            if not process.is_alive():
+                result = {'engine': arguments[0], 'size': arguments[1], 'error': f"exit code {process.exitcode}"}
+                break
+    process.join()
+    return result
+
+
+def run(engines: List[str], sizes: List[int], seconds: float=1.0, max_ticks: int=100,
+        verbose: bool=False) -> List[Dict]:
+    results = []
+    for size in sizes:
+        for name in engines:
+            result = spawn((name, size, seconds, max_ticks))
+            results.append(result)
+            if verbose and 'ms_per_tick' in result:
+                memory = '-' if result['peak_rss_mb'] is None else f"{result['peak_rss_mb']:.1f}"
+                print(f"{name:>18} {size:>6}  {result['ms_per_tick']:10.3f} ms/tick  "
+                      f"{result['cells_per_second'] / 1e6:10.1f} Mcells/s {result['region']:<10}  "
+                      f"{100 * result['visualize_share']:5.1f}% visualize  "
+                      f"{memory:>8} MB  {result.get('matches', result.get('unchecked', '-'))}", file=sys.stderr, flush=True)
+            elif verbose:
+                print(f"{name:>18} {size:>6}  {result['error']}", file=sys.stderr, flush=True)
+    return results
+
+
+def main(arguments: List[str]=None) -> int:
+    parser = argparse.ArgumentParser(description="Game of Life and Gray-Scott engine benchmark")
+    parser.add_argument('--engines', nargs='+', choices=[*Engines], default=[*Engines])
+    parser.add_argument('--sizes', type=int, nargs='+', default=Sizes,
+                        help="edge lengths of the square grids; 16384 needs several GB per Gray-Scott engine")
+    parser.add_argument('--seconds', type=float, default=1.0, help="time budget per engine and size")
+    parser.add_argument('--max-ticks', type=int, default=100)
+    parser.add_argument('--output', help="JSON file for the results instead of stdout")
+    args = parser.parse_args(arguments)
+
+    results = run(args.engines, args.sizes, args.seconds, args.max_ticks, verbose=True)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    return 0 if all(result.get('matches', True) and 'error' not in result for result in results) else 1
+
+
+# region Unit Tests
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_check(self):
+        for name in ['packed', 'tiled', 'parallel', 'hashlife', 'gray-scott-fused']:
+            family = Engines[name][0]
+            self.assertLessEqual(check(name, 96, generations=20), References[family][1])
+
+    def test_run(self):
+        engines = ['dense', 'packed', 'spectral', 'parallel', 'hashlife']
+        results = run(engines, [64], seconds=0.01, max_ticks=5)
+        self.assertEqual([result['engine'] for result in results], engines)
+        for result in results:
+            self.assertEqual(result['size'], 64)
+            self.assertGreater(result['cells_per_second'], 0)
+            self.assertTrue(0 < result['visualize_share'] < 1)
+            self.assertGreater(result['peak_rss_mb'], 0)
+        self.assertTrue(results[1]['matches'])
+        self.assertNotIn('matches', results[2])
+        self.assertEqual(results[2]['unchecked'], Unchecked['spectral'])
+        self.assertEqual(results[0]['workers_rss_mb'], 0)
+        self.assertGreater(results[3]['workers_rss_mb'], 0)
+        self.assertEqual(results[4]['generations_per_tick'], Skipping.Skip)
+        self.assertEqual([result['region'] for result in results], ['grid'] * 4 + ['light-cone'])
+        self.assertTrue(results[4]['matches'])
+
+    def test_skipping(self):
+        engine = Skipping((96, 96), skip=8)
+        game = GameOfLife((96, 96), fill_rate=0.0)
+        game.world[:] = engine.visualize() == 0
+        engine.tick()
+        game.advance(8)
+        self.assertEqual(engine.generation, 8)
+        self.assertEqual(engine.cells, (64 + 16) ** 2)
+        engine.visualize()
+        np.testing.assert_array_equal(engine.display.world, game.world)
+
+    def test_memory(self):
+        self.assertGreater(peak_rss(), 0)
+        with mock.patch.object(resource, 'getrusage', return_value=mock.Mock(ru_maxrss=64 * 1024 * 1024)):
+            with mock.patch.object(sys, 'platform', 'darwin'):
+                self.assertEqual(peak_rss(), 64)
+            with mock.patch.object(sys, 'platform', 'linux'):
+                self.assertEqual(peak_rss(children=True), 64 * 1024)
+        with mock.patch(f"{__name__}.resource", None), mock.patch.object(sys, 'stderr', io.StringIO()) as stderr:
+            self.assertIsNone(peak_rss())
+            self.assertIsNone(measure('spectral', 32, seconds=0.01, max_ticks=3)['peak_rss_mb'])
+            run(['spectral'], [32], seconds=0.01, max_ticks=3, verbose=True)
+        self.assertIn(' - MB', stderr.getvalue())
+
+
+# endregion
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+import hashlib
+import unittest
+import collections
+import numpy as np
+from typing import Optional
+
+from life import GameOfLife, GrayScottDiffusion
+from packed import PackedGameOfLife
+
+
+class Cycles:
+
+    States = ('words', 'world')
+
+    def __init__(self, history: int=1024):
+        self.history = history
+        self.digests = collections.OrderedDict()
+        self.start, self.period = None, None
+
+    def reset(self):
+        self.digests.clear()
+        self.start, self.period = None, None
+
+    @classmethod
+    def supports(cls, game) -> bool:
+        return any(hasattr(game, name) for name in cls.States)
+
+    def digest(self, game) -> bytes:
+        state = next((getattr(game, name) for name in self.States if hasattr(game, name)), None)
+        if state is None:
+            raise TypeError(f"{type(game).__name__} has no cellular state to detect cycles in")
+        return hashlib.blake2b(np.ascontiguousarray(state).data, digest_size=16).digest()
+
+    def observe(self, game) -> Optional[int]:
+        if self.period is not None:
+            return self.period
+        digest = self.digest(game)
+        start = self.digests.get(digest)
+        if start is not None:
+            self.start, self.period = start, game.generation - start
+            return self.period
+        self.digests[digest] = game.generation
+        if len(self.digests) > self.history:
+            self.digests.popitem(last=False)
+        return None
+
+    def skip(self, game, generations: int):
+        game.generation += generations
+        seen = getattr(game, 'seen', None)
+        if seen is not None:
+            np.add(seen, generations, out=seen, where=seen >= self.start + game.Fading, casting='unsafe')
+
+    def run(self, game, generations: int, fast_forward: bool=True) -> int:
+        target = game.generation + generations
+        self.observe(game)
+        while self.period is None and game.generation < target:
+            game.tick()
+            self.observe(game)
+        if self.period is not None and fast_forward:
+            self.skip(game, (target - game.generation) // self.period * self.period)
+            game.advance(target - game.generation)
+        return game.generation
+
+
+# region Unit Tests
+
+
+class TestCycles(unittest.TestCase):
+
+    @staticmethod
+    def blinker(Game: type=GameOfLife) -> GameOfLife:
+        world = np.zeros(shape=(16, 16), dtype=np.uint8)
+        world[5:8, 6] = 1
+        world[10:12, 10:12] = 1
+        if Game is PackedGameOfLife:
+            return PackedGameOfLife((16, 16), world=world)
+        game = Game((16, 16), fill_rate=0.0)
+        game.world[:] = world
+        return game
+
+    def test_period(self):
+        for Game in [GameOfLife, PackedGameOfLife]:
+            cycles = Cycles()
+            game = self.blinker(Game)
+            self.assertEqual(cycles.run(game, 1000, fast_forward=False), 2)
+            self.assertEqual((cycles.start, cycles.period), (0, 2))
+
+        cycles = Cycles()
+        game = GameOfLife((16, 16), fill_rate=0.0)
+        game.world[10:12, 10:12] = 1
+        cycles.run(game, 1000, fast_forward=False)
+        self.assertEqual((cycles.start, cycles.period), (0, 1))
+
+        cycles = Cycles(history=1)
+        self.assertEqual(cycles.run(self.blinker(), 100, fast_forward=False), 100)
+        self.assertIsNone(cycles.period)
+
+        diffusion = GrayScottDiffusion((16, 16), fused=True)
+        self.assertFalse(Cycles.supports(diffusion))
+        with self.assertRaises(TypeError):
+            Cycles().observe(diffusion)
+
+    def test_fast_forward(self):
+        game, stepped = GameOfLife((48, 48), fill_rate=0.3, history=True), GameOfLife((48, 48), history=True)
+        stepped.world[:] = game.world
+        cycles = Cycles()
+        self.assertEqual(cycles.run(game, 5001), 5001)
+        self.assertIsNotNone(cycles.period)
+        stepped.advance(5001)
+        np.testing.assert_array_equal(game.world, stepped.world)
+        np.testing.assert_array_equal(game.visualize(), stepped.visualize())
+
+
+# endregion
@@ -0,0 +1,233 @@
+import unittest
+import numpy as np
+from typing import Tuple
+
+from life import GameOfLife
+
+
+class HashLife:
+
+    class Node:
+
+        __slots__ = ('level', 'nw', 'ne', 'sw', 'se', 'population')
+
+        def __init__(self, level: int, nw: 'HashLife.Node'=None, ne: 'HashLife.Node'=None,
+                     sw: 'HashLife.Node'=None, se: 'HashLife.Node'=None, population: int=0):
+            self.level = level
+            self.nw, self.ne, self.sw, self.se = nw, ne, sw, se
+            self.population = population
+
+        def __repr__(self) -> str:
+            return f"Node(level={self.level}, population={self.population})"
+
+    def __init__(self, rule: int=GameOfLife.Conway, max_nodes: int=1_000_000):
+        if isinstance(rule, str):
+            rule, states = GameOfLife.compile(rule)
+            if states > 2:
+                raise ValueError("HashLife doesn't support multi-state rules")
+        self.rule = int(rule)
+        if self.rule & 1:
+            raise ValueError("HashLife can't grow the universe under B0 rules")
+        self.max_nodes = max_nodes
+        self.dead, self.alive = self.Node(0, population=0), self.Node(0, population=1)
+        self.nodes, self.results, self.empties = {}, {}, [self.dead]
+        self.root = self.empty(3)
+        self.origin = (-4, -4)
+        self.generation = 0
+
+    @property
+    def population(self) -> int:
+        return self.root.population
+
+    def join(self, nw: Node, ne: Node, sw: Node, se: Node) -> Node:
+        key = (nw, ne, sw, se)
+        node = self.nodes.get(key)
+        if node is None:
+            population = nw.population + ne.population + sw.population + se.population
+            node = self.nodes[key] = self.Node(nw.level + 1, nw, ne, sw, se, population)
+        return node
+
+    def empty(self, level: int) -> Node:
+        while len(self.empties) <= level:
+            smaller = self.empties[-1]
+            self.empties.append(self.join(smaller, smaller, smaller, smaller))
+        return self.empties[level]
+
+    def center(self, node: Node) -> Node:
+        empty = self.empty(node.level - 1)
+        return self.join(self.join(empty, empty, empty, node.nw), self.join(empty, empty, node.ne, empty),
+                         self.join(empty, node.sw, empty, empty), self.join(node.se, empty, empty, empty))
+
+    def padded(self, node: Node) -> bool:
+        inner = node.nw.se.se.population + node.ne.sw.sw.population + \
+                node.sw.ne.ne.population + node.se.nw.nw.population
+        return inner == node.population
+
+    def base(self, node: Node) -> Node:
+        cells = [[node.nw.nw, node.nw.ne, node.ne.nw, node.ne.ne],
+                 [node.nw.sw, node.nw.se, node.ne.sw, node.ne.se],
+                 [node.sw.nw, node.sw.ne, node.se.nw, node.se.ne],
+                 [node.sw.sw, node.sw.se, node.se.sw, node.se.se]]
+        following = []
+        for row in (1, 2):
+            for column in (1, 2):
+                neighbors = sum(cells[row + dr][column + dc].population
+                                for dr in (-1, 0, 1) for dc in (-1, 0, 1) if dr or dc)
+                index = 2 * neighbors + cells[row][column].population
+                following.append(self.alive if (self.rule >> index) & 1 else self.dead)
+        return self.join(*following)
+
+    def successor(self, node: Node, j: int) -> Node:
+        j = min(j, node.level - 2)
+        if node.population == 0:
+            return node.nw
+        key = (node, j)
+        result = self.results.get(key)
+        if result is not None:
+            return result
+        if node.level == 2:
+            result = self.base(node)
+        else:
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            deeper = j - 1 if j == node.level - 2 else j
+            c1 = self.successor(nw, deeper)
+            c2 = self.successor(self.join(nw.ne, ne.nw, nw.se, ne.sw), deeper)
+            c3 = self.successor(ne, deeper)
+            c4 = self.successor(self.join(nw.sw, nw.se, sw.nw, sw.ne), deeper)
+            c5 = self.successor(self.join(nw.se, ne.sw, sw.ne, se.nw), deeper)
+            c6 = self.successor(self.join(ne.sw, ne.se, se.nw, se.ne), deeper)
+            c7 = self.successor(sw, deeper)
+            c8 = self.successor(self.join(sw.ne, se.nw, sw.se, se.sw), deeper)
+            c9 = self.successor(se, deeper)
+            if j < node.level - 2:
+                result = self.join(self.join(c1.se, c2.sw, c4.ne, c5.nw), self.join(c2.se, c3.sw, c5.ne, c6.nw),
+                                   self.join(c4.se, c5.sw, c7.ne, c8.nw), self.join(c5.se, c6.sw, c8.ne, c9.nw))
+            else:
+                result = self.join(self.successor(self.join(c1, c2, c4, c5), deeper),
+                                   self.successor(self.join(c2, c3, c5, c6), deeper),
+                                   self.successor(self.join(c4, c5, c7, c8), deeper),
+                                   self.successor(self.join(c5, c6, c8, c9), deeper))
+        self.results[key] = result
+        return result
+
+    def step(self, j: int):
+        while self.root.level < j + 3 or not self.padded(self.root):
+            half = 1 << (self.root.level - 1)
+            self.root = self.center(self.root)
+            self.origin = (self.origin[0] - half, self.origin[1] - half)
+        quarter = 1 << (self.root.level - 2)
+        self.root = self.successor(self.root, j)
+        self.origin = (self.origin[0] + quarter, self.origin[1] + quarter)
+        self.generation += 1 << j
+        if len(self.nodes) > self.max_nodes:
+            self.collect()
+
+    def advance(self, generations: int):
+        j = 0
+        while generations:
+            if generations & 1:
+                self.step(j)
+            generations, j = generations >> 1, j + 1
+
+    def collect(self):
+        reachable, stack = {}, [self.root, *self.empties[1:]]
+        while stack:
+            node = stack.pop()
+            if node.level == 0:
+                continue
+            key = (node.nw, node.ne, node.sw, node.se)
+            if key not in reachable:
+                reachable[key] = node
+                stack.extend(key)
+        self.nodes = reachable
+        self.results.clear()
+
+    def build(self, block: np.ndarray, level: int) -> Node:
+        if level == 0:
+            return self.alive if block[0, 0] else self.dead
+        if not block.any():
+            return self.empty(level)
+        half = 1 << (level - 1)
+        return self.join(self.build(block[:half, :half], level - 1), self.build(block[:half, half:], level - 1),
+                         self.build(block[half:, :half], level - 1), self.build(block[half:, half:], level - 1))
+
+    @classmethod
+    def from_world(cls, world: np.ndarray, origin: Tuple[int, int]=(0, 0), **kwargs) -> 'HashLife':
+        hashlife = cls(**kwargs)
+        level = max(3, int(max(world.shape) - 1).bit_length())
+        block = np.zeros(shape=(1 << level, 1 << level), dtype=np.uint8)
+        block[:world.shape[0], :world.shape[1]] = world
+        hashlife.root = hashlife.build(block, level)
+        hashlife.origin = origin
+        return hashlife
+
+    def to_world(self, size: Tuple[int, int], corner: Tuple[int, int]=(0, 0)) -> np.ndarray:
+        world = np.zeros(shape=size, dtype=np.uint8)
+        stack = [(self.root, self.origin[0] - corner[0], self.origin[1] - corner[1])]
+        while stack:
+            node, row, column = stack.pop()
+            side = 1 << node.level
+            if node.population == 0 or row >= size[0] or column >= size[1] or row + side <= 0 or column + side <= 0:
+                continue
+            if node.level == 0:
+                world[row, column] = 1
+                continue
+            half = side >> 1
+            stack.extend([(node.nw, row, column), (node.ne, row, column + half),
+                          (node.sw, row + half, column), (node.se, row + half, column + half)])
+        return world
+
+
+# region Unit Tests
+
+
+class TestHashLife(unittest.TestCase):
+
+    Glider = np.array([[0, 1, 0], [0, 0, 1], [1, 1, 1]], dtype=np.uint8)
+
+    def test_conversion(self):
+        world = (np.random.random(size=(37, 53)) < 0.3).astype(np.uint8)
+        hashlife = HashLife.from_world(world, origin=(5, -3))
+        self.assertEqual(hashlife.population, world.sum())
+        np.testing.assert_array_equal(hashlife.to_world(world.shape, corner=(5, -3)), world)
+
+    def test_identical(self):
+        size, margin = (160, 160), 64
+        for rule in ['B3/S23', 'B36/S23']:
+            game = GameOfLife(size, rule=rule)
+            game.world[:] = 0
+            game.world[margin:-margin, margin:-margin] = np.random.random(size=(32, 32)) < 0.4
+            hashlife = HashLife.from_world(game.world, rule=rule)
+            for generations in [1, 2, 3, 8, 5, 13]:
+                for generation in range(generations):
+                    game.tick()
+                hashlife.advance(generations)
+                np.testing.assert_array_equal(hashlife.to_world(size), game.world)
+        with self.assertRaises(ValueError):
+            HashLife('B03/S23')
+
+    def test_skip(self):
+        hashlife = HashLife.from_world(self.Glider)
+        hashlife.step(40)
+        self.assertEqual(hashlife.generation, 1 << 40)
+        self.assertEqual(hashlife.population, 5)
+        shift = (1 << 40) // 4
+        np.testing.assert_array_equal(hashlife.to_world((3, 3), corner=(shift, shift)), self.Glider)
+
+    def test_collect(self):
+        world = np.zeros(shape=(64, 64), dtype=np.uint8)
+        world[24:40, 24:40] = np.random.random(size=(16, 16)) < 0.4
+        bounded = HashLife.from_world(world, max_nodes=500)
+        unbounded = HashLife.from_world(world)
+        for generation in range(20):
+            bounded.advance(3)
+            unbounded.advance(3)
+        self.assertLess(len(bounded.nodes), len(unbounded.nodes))
+        self.assertEqual(bounded.origin, unbounded.origin)
+        self.assertEqual(bounded.root.level, unbounded.root.level)
+        size = 1 << unbounded.root.level
+        np.testing.assert_array_equal(bounded.to_world((size, size), bounded.origin),
+                                      unbounded.to_world((size, size), unbounded.origin))
+
+
+# endregion
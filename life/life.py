@@ -1,34 +1,145 @@
+import unittest
+import tracemalloc
 import numpy as np
+from typing import Tuple
 
 
 class GameOfLife:
 
-    def __init__(self, size: tuple=(400, 400), fill_rate: int=0.50):
+    fields = ('world', 'seen')
+    Conway = np.uint32(sum(1 << (2 * neighbors + alive) for neighbors, alive in [(3, 0), (2, 1), (3, 1)]))
+    Fading = 256
+
+    def __init__(self, size: tuple=(400, 400), fill_rate: int=0.50, rule: str='B3/S23', history: bool=False):
         self.world = (np.random.random(size=size) < fill_rate).astype(np.uint8)
         self.visualization = 255 * np.ones(shape=size, dtype=np.uint8)
         self.neighbors = np.zeros(shape=size, dtype=np.uint8)
+        self.index = np.zeros(shape=size, dtype=np.uint8)
+        self.lookup = np.zeros(shape=size, dtype=np.uint32)
+        self.rulestring = rule
+        self.rule, self.states = self.compile(rule)
+        self.alive = None if self.states == 2 else np.zeros(shape=size, dtype=np.uint8)
+        self.mask = None if self.states == 2 else np.zeros(shape=size, dtype=bool)
+        self.generation = 0
+        self.seen = np.zeros(shape=size, dtype=np.uint32) if history else None
+
+    @staticmethod
+    def compile(rule: str) -> Tuple[np.uint32, int]:
+        parts = rule.upper().replace(' ', '').split('/')
+        birth, survival, states = '', '', 2
+        if all(part.isdigit() or not part for part in parts):
+            survival, birth, *rest = parts + [''] * (2 - len(parts))
+            states = int(rest[0]) if rest and rest[0] else 2
+        else:
+            for part in parts:
+                if part[:1] == 'B':
+                    birth = part[1:]
+                elif part[:1] == 'S':
+                    survival = part[1:]
+                elif part[:1] in ('C', 'G') or part.isdigit():
+                    states = int(part.lstrip('CG'))
+                else:
+                    raise ValueError(f"Can't parse rule {rule!r}")
+        digits = birth + survival
+        if (digits and not digits.isdigit()) or '9' in digits or states < 2:
+            raise ValueError(f"Can't parse rule {rule!r}")
+        table = sum(1 << (2 * int(neighbors)) for neighbors in set(birth)) | \
+            sum(1 << (2 * int(neighbors) + 1) for neighbors in set(survival))
+        return np.uint32(table), states
 
     def tick(self):
-        self.neighbors[:, :] = 0
-        self.neighbors[+1:-1, +1:-1] += \
-                self.world[  :-2, :-2] + self.world[  :-2, +1:-1] + self.world[  :-2, +2:] + \
-                self.world[+1:-1, :-2]                            + self.world[+1:-1, +2:] + \
-                self.world[+2:,   :-2] + self.world[+2:  , +1:-1] + self.world[+2:  , +2:]
-        birth = ((self.neighbors == 3) & (self.world == 0))
-        survive = (((self.neighbors == 2) | (self.neighbors == 3)) & (self.world == 1))
-        self.world[:, :] = 0
-        self.world[birth | survive] = 1
-
-    def visualize(self) -> np.array:
-        self.visualization += (self.visualization < 255).astype(np.uint8)
-        self.visualization = self.visualization.clip(128, 255)
-        self.visualization[(self.world == 1)] = 0
-        return self.visualization
+        neighbors, world = self.neighbors[+1:-1, +1:-1], self.world
+        alive = world if self.states == 2 else self.alive
+        if self.states > 2:
+            np.equal(world, 1, out=alive.view(bool))
+        np.add(alive[  :-2,  :-2], alive[  :-2, +1:-1], out=neighbors)
+        np.add(neighbors, alive[  :-2, +2:  ], out=neighbors)
+        np.add(neighbors, alive[+1:-1,  :-2], out=neighbors)
+        np.add(neighbors, alive[+1:-1, +2:  ], out=neighbors)
+        np.add(neighbors, alive[+2:  ,  :-2], out=neighbors)
+        np.add(neighbors, alive[+2:  , +1:-1], out=neighbors)
+        np.add(neighbors, alive[+2:  , +2:  ], out=neighbors)
+        np.left_shift(self.neighbors, 1, out=self.index)
+        np.bitwise_or(self.index, alive, out=self.index)
+        np.right_shift(self.rule, self.index, out=self.lookup)
+        np.bitwise_and(self.lookup, 1, out=alive, casting='unsafe')
+        if self.states > 2:
+            self.decay()
+        self.generation += 1
+        if self.seen is not None:
+            np.copyto(self.seen, self.generation + self.Fading, where=alive.view(bool))
+
+    def decay(self):
+        world, alive, mask = self.world, self.alive, self.mask
+        np.greater(world, 1, out=mask)
+        np.copyto(alive, 0, where=mask)
+        np.not_equal(world, 0, out=mask)
+        np.add(world, mask, out=world, casting='unsafe')
+        np.equal(world, self.states, out=mask)
+        np.copyto(world, 0, where=mask)
+        np.copyto(world, 1, where=alive.view(bool))
+
+    def advance(self, generations: int):
+        for generation in range(generations):
+            self.tick()
+
+    def visualize(self, out: np.ndarray=None) -> np.array:
+        out = self.visualization if out is None else out
+        if self.states > 2:
+            np.equal(self.world, 1, out=self.mask)
+        alive = self.world.view(bool) if self.states == 2 else self.mask
+        if self.seen is None:
+            faded = self.visualization
+            np.minimum(faded, 254, out=faded)
+            np.add(faded, 1, out=faded)
+            np.maximum(faded, 128, out=faded)
+            np.copyto(faded, 0, where=alive)
+            if out is not faded:
+                np.copyto(out, faded)
+            return out
+        age = self.lookup[:out.shape[0], :out.shape[1]]
+        np.subtract(self.generation + self.Fading + 127, self.seen, out=age)
+        np.minimum(age, 255, out=age)
+        np.copyto(out, age, casting='unsafe')
+        np.copyto(out, 0, where=alive)
+        return out
 
 
 class GrayScottDiffusion:
 
-    def __init__(self, size: tuple=(400, 400), coeffs: dict=None):
+    fields = ('u', 'v')
+    Coeffs = (0.10, 0.10, 0.018, 0.050)
+
+    class Kernel:
+
+        def __init__(self, shape: tuple, dtype: type=np.float32):
+            self.laplace = np.zeros(shape=(2, *shape), dtype=dtype)
+            self.rates = np.zeros(shape=(2, *shape), dtype=dtype)
+            self.uvv = np.zeros(shape=shape, dtype=dtype)
+            self.reaction = np.zeros(shape=shape, dtype=dtype)
+
+        def __call__(self, uv: np.ndarray, diffusion: np.ndarray, f, k):
+            laplace, center = self.laplace[..., +1:-1, +1:-1], self.rates[..., +1:-1, +1:-1]
+            np.add(uv[..., +1:-1, +2:], uv[..., :-2, +1:-1], out=laplace)
+            np.add(laplace, uv[..., +2:, +1:-1], out=laplace)
+            np.add(laplace, uv[..., +1:-1, :-2], out=laplace)
+            np.multiply(uv[..., +1:-1, +1:-1], 4, out=center)
+            np.subtract(laplace, center, out=laplace)
+            np.multiply(self.laplace, diffusion, out=self.rates)
+
+            (u, v), (du, dv), uvv, reaction = uv, self.rates, self.uvv, self.reaction
+            np.multiply(u, v, out=uvv)
+            np.multiply(uvv, v, out=uvv)
+            np.subtract(du, uvv, out=du)
+            np.add(dv, uvv, out=dv)
+            np.subtract(1, u, out=reaction)
+            np.multiply(reaction, f, out=reaction)
+            np.add(du, reaction, out=du)
+            np.multiply(v, f + k, out=reaction)
+            np.subtract(dv, reaction, out=dv)
+            np.add(uv, self.rates, out=uv)
+
+    def __init__(self, size: tuple=(400, 400), coeffs: dict=None, fused: bool=False):
         self.u = np.ones(shape=size, dtype=np.double)
         self.v = np.zeros(shape=size, dtype=np.double)
         box_xrange = int(size[0] * 0.45), int(size[0] * 0.55)
@@ -37,13 +148,23 @@ class GrayScottDiffusion:
         self.v[box_xrange[0]:box_xrange[1], box_yrange[0]:box_yrange[1]] = 0.25
         self.u += 0.05 * np.random.uniform(-1, +1, size)
         self.v += 0.05 * np.random.uniform(-1, +1, size)
-        if coeffs is None:
-            self.cu, self.cv, self.f, self.k = 0.10, 0.10, 0.018, 0.050
-        else:
-            self.cu, self.cv, self.f, self.k = coeffs
+        self.cu, self.cv, self.f, self.k = self.Coeffs if coeffs is None else coeffs
         self.delegate = None
+        self.generation = 0
+        self.fused = fused
+        if fused:
+            self.uv = np.stack([self.u, self.v]).astype(np.float32)
+            self.u, self.v = self.uv
+            self.diffusion = np.array([self.cu, self.cv], dtype=np.float32).reshape(2, 1, 1)
+            self.kernel = self.Kernel(size, np.float32)
+        self.visualization = np.zeros(shape=size, dtype=np.uint8)
+        self.scratch = np.zeros(shape=size, dtype=self.v.dtype)
 
     def tick(self):
+        if self.fused:
+            self.kernel(self.uv, self.diffusion, self.f, self.k)
+            self.generation += 1
+            return
         laplace_u = np.zeros(shape=self.u.shape)
         laplace_u[+1:-1, +1:-1] += self.u[+1:-1, +2:] + \
             self.u[:-2, +1:-1] - 4*self.u[+1:-1, +1:-1] + self.u[+2:, +1:-1] + \
@@ -55,11 +176,149 @@ class GrayScottDiffusion:
         uvv = self.u * self.v * self.v
         self.u += self.cu * laplace_u - uvv + self.f * (1 - self.u)
         self.v += self.cv * laplace_v + uvv - (self.f + self.k) * self.v
+        self.generation += 1
 
-    def visualize(self) -> np.array:
+    def advance(self, generations: int):
+        for generation in range(generations):
+            self.tick()
+
+    def visualize(self, out: np.ndarray=None) -> np.array:
+        out = self.visualization if out is None else out
         min, max = self.v.min(), self.v.max()
-        self.visualization = (255 * ((self.v - min) / (max - min))).astype(np.uint8)
-        return self.visualization
+        np.subtract(self.v, min, out=self.scratch)
+        np.multiply(self.scratch, 255 / (max - min), out=self.scratch)
+        np.copyto(out, self.scratch, casting='unsafe')
+        return out
+
+
+# region Unit Tests
+
+
+class TestGameOfLife(unittest.TestCase):
+
+    @staticmethod
+    def reference(world: np.ndarray, births: tuple=(3,), survivals: tuple=(2, 3)) -> np.ndarray:
+        neighbors = np.zeros(shape=world.shape, dtype=np.uint8)
+        neighbors[+1:-1, +1:-1] += \
+                world[  :-2, :-2] + world[  :-2, +1:-1] + world[  :-2, +2:] + \
+                world[+1:-1, :-2]                       + world[+1:-1, +2:] + \
+                world[+2:,   :-2] + world[+2:  , +1:-1] + world[+2:  , +2:]
+        birth = (np.isin(neighbors, births) & (world == 0))
+        survive = (np.isin(neighbors, survivals) & (world == 1))
+        following = np.zeros(shape=world.shape, dtype=np.uint8)
+        following[birth | survive] = 1
+        return following
+
+    def test_tick(self):
+        game = GameOfLife((64, 80), fill_rate=0.35)
+        for generation in range(50):
+            expected = self.reference(game.world)
+            game.tick()
+            np.testing.assert_array_equal(game.world, expected)
+
+    def test_rebound(self):
+        game = GameOfLife((48, 64), fill_rate=0.35)
+        game.tick()
+        game.world = game.world.copy()
+        expected = self.reference(game.world)
+        game.tick()
+        np.testing.assert_array_equal(game.world, expected)
+
+    def test_rules(self):
+        self.assertEqual(GameOfLife.compile('B3/S23'), (GameOfLife.Conway, 2))
+        self.assertEqual(GameOfLife.compile('23/3'), (GameOfLife.Conway, 2))
+        self.assertEqual(GameOfLife.compile('B33/S223'), (GameOfLife.Conway, 2))
+        self.assertEqual(GameOfLife.compile('/2/3'), GameOfLife.compile('B2/S/C3'))
+        for rule in ['B39/S23', 'B3/X23', 'B3/S23/C1']:
+            with self.assertRaises(ValueError):
+                GameOfLife.compile(rule)
+        for rule, births, survivals in [('B36/S23', (3, 6), (2, 3)), ('B3678/S34678', (3, 6, 7, 8), (3, 4, 6, 7, 8)),
+                                        ('B1357/S02468', (1, 3, 5, 7), (0, 2, 4, 6, 8))]:
+            game = GameOfLife((48, 64), fill_rate=0.4, rule=rule)
+            for generation in range(30):
+                expected = self.reference(game.world, births, survivals)
+                game.tick()
+                np.testing.assert_array_equal(game.world, expected)
+
+    def test_generations(self):
+        game = GameOfLife((48, 64), fill_rate=0.3, rule='B2/S/C4')
+        world, decayed = game.world.copy(), False
+        for generation in range(40):
+            alive = (world == 1).astype(np.uint8)
+            following = self.reference(alive, births=(2,), survivals=())
+            following[world > 1] = 0
+            world = np.where(world > 0, (world + 1) % 4, 0).astype(np.uint8)
+            world[following == 1] = 1
+            game.tick()
+            np.testing.assert_array_equal(game.world, world)
+            decayed = decayed or bool(np.any(game.world == 3))
+        self.assertTrue(decayed)
+        frame = game.visualize()
+        np.testing.assert_array_equal(frame == 0, game.world == 1)
+
+    def test_fading(self):
+        game, stepped = GameOfLife((64, 64), fill_rate=0.35, history=True), GameOfLife((64, 64))
+        framed = GameOfLife((64, 64))
+        stepped.world[:] = framed.world[:] = game.world
+        visualization = 255 * np.ones(shape=game.world.shape, dtype=np.uint8)
+        frames = 255 * np.ones(shape=game.world.shape, dtype=np.uint8)
+        for frame in range(20):
+            game.advance(7)
+            framed.advance(7)
+            for generation in range(7):
+                stepped.tick()
+                visualization += (visualization < 255).astype(np.uint8)
+                visualization = visualization.clip(128, 255)
+                visualization[(stepped.world == 1)] = 0
+            frames += (frames < 255).astype(np.uint8)
+            frames = frames.clip(128, 255)
+            frames[(stepped.world == 1)] = 0
+            self.assertEqual(game.generation, stepped.generation)
+            np.testing.assert_array_equal(game.visualize(), visualization)
+            np.testing.assert_array_equal(framed.visualize(), frames)
+        self.assertIsNone(framed.seen)
+
+    def test_allocations(self):
+        for rule, history in [('B3/S23', False), ('B3/S23', True), ('B2/S/C3', False), ('B2/S/C3', True)]:
+            game = GameOfLife((512, 512), rule=rule, history=history)
+            game.tick()
+            frame = np.zeros(shape=game.world.shape, dtype=np.uint8)
+            tracemalloc.start()
+            for generation in range(5):
+                game.tick()
+                game.visualize(out=frame)
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.assertLess(peak, game.world.nbytes // 4)
+
+
+class TestGrayScottDiffusion(unittest.TestCase):
+
+    def test_fused(self):
+        for coeffs in [(0.16, 0.08, 0.035, 0.065), (0.10, 0.10, 0.018, 0.050)]:
+            reference = GrayScottDiffusion((80, 100), coeffs=coeffs)
+            fused = GrayScottDiffusion((80, 100), coeffs=coeffs, fused=True)
+            fused.u[:], fused.v[:] = reference.u, reference.v
+            for generation in range(500):
+                reference.tick()
+                fused.tick()
+            self.assertEqual(fused.v.dtype, np.float32)
+            np.testing.assert_allclose(fused.u, reference.u, atol=1e-4)
+            np.testing.assert_allclose(fused.v, reference.v, atol=1e-4)
+
+    def test_allocations(self):
+        diffusion = GrayScottDiffusion((512, 512), fused=True)
+        diffusion.tick()
+        frame = np.zeros(shape=diffusion.v.shape, dtype=np.uint8)
+        tracemalloc.start()
+        diffusion.advance(5)
+        diffusion.visualize(out=frame)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.assertLess(peak, diffusion.u.nbytes // 4)
+
+
+# endregion
 
 
 if __name__ == '__main__':
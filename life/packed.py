@@ -0,0 +1,132 @@
+import unittest
+import numpy as np
+
+from life import GameOfLife
+
+
+def pack(world: np.ndarray) -> np.ndarray:
+    height, width = world.shape
+    num_words = (width + 63) // 64
+    padded = np.zeros(shape=(height, num_words * 64), dtype=np.uint8)
+    padded[:, :width] = world
+    packed = np.packbits(padded, axis=1, bitorder='little')
+    return packed.view(np.dtype('<u8')).astype(np.uint64, copy=False)
+
+
+def unpack(words: np.ndarray, width: int) -> np.ndarray:
+    packed = words.astype(np.dtype('<u8'), copy=False).view(np.uint8)
+    return np.unpackbits(packed, axis=1, count=width, bitorder='little')
+
+
+class PackedGameOfLife:
+
+    Band = 256
+
+    def __init__(self, size: tuple=(400, 400), fill_rate: int=0.50, world: np.ndarray=None):
+        self.size = size
+        self.num_words = (size[1] + 63) // 64
+        if world is None:
+            self.words = np.zeros(shape=(size[0], self.num_words), dtype=np.uint64)
+            for row in range(0, size[0], self.Band):
+                band = np.random.random(size=(min(self.Band, size[0] - row), size[1])) < fill_rate
+                self.words[row:row + self.Band] = pack(band)
+        else:
+            self.words = pack(world)
+        self.following = np.zeros_like(self.words)
+        self.visualization = None
+        self.generation = 0
+
+        interior = np.zeros(shape=(1, self.num_words * 64), dtype=np.uint8)
+        interior[0, 1:size[1] - 1] = 1
+        self.interior = pack(interior)[0]
+
+    @property
+    def world(self) -> np.ndarray:
+        return unpack(self.words, self.size[1])
+
+    def tick(self):
+        height = self.size[0]
+        self.following[0] = 0
+        self.following[height - 1] = 0
+        for first in range(1, height - 1, self.Band):
+            last = min(first + self.Band, height - 1)
+            self.following[first:last] = self.band(self.words[first - 1:last + 1])
+        self.words, self.following = self.following, self.words
+        self.generation += 1
+
+    def advance(self, generations: int):
+        for generation in range(generations):
+            self.tick()
+
+    def band(self, words: np.ndarray) -> np.ndarray:
+        one = np.uint64(1)
+        west = words << one
+        west[:, 1:] |= words[:, :-1] >> np.uint64(63)
+        east = words >> one
+        east[:, :-1] |= words[:, 1:] << np.uint64(63)
+
+        sum_ones = west ^ words ^ east
+        sum_twos = (west & words) | (east & (west | words))
+        top_ones, top_twos = sum_ones[:-2], sum_twos[:-2]
+        bottom_ones, bottom_twos = sum_ones[2:], sum_twos[2:]
+        middle_ones, middle_twos = (west ^ east)[1:-1], (west & east)[1:-1]
+
+        ones = top_ones ^ bottom_ones ^ middle_ones
+        carry = (top_ones & bottom_ones) | (middle_ones & (top_ones | bottom_ones))
+        outer, inner = top_twos ^ bottom_twos, middle_twos ^ carry
+        twos = outer ^ inner
+        fours = (top_twos & bottom_twos) ^ (middle_twos & carry) ^ (outer & inner)
+
+        alive = twos & ~fours & (ones | words[1:-1])
+        alive &= self.interior
+        return alive
+
+    def visualize(self, out: np.ndarray=None) -> np.array:
+        if self.visualization is None:
+            self.visualization = 255 * np.ones(shape=self.size, dtype=np.uint8)
+        np.minimum(self.visualization, 254, out=self.visualization)
+        np.add(self.visualization, 1, out=self.visualization)
+        np.maximum(self.visualization, 128, out=self.visualization)
+        np.copyto(self.visualization, 0, where=self.world.view(bool))
+        if out is None:
+            return self.visualization
+        np.copyto(out, self.visualization)
+        return out
+
+
+# region Unit Tests
+
+
+class TestPackedGameOfLife(unittest.TestCase):
+
+    def test_conversion(self):
+        for width in [3, 63, 64, 65, 200]:
+            world = (np.random.random(size=(7, width)) < 0.5).astype(np.uint8)
+            np.testing.assert_array_equal(unpack(pack(world), width), world)
+
+    def test_identical(self):
+        for size in [(50, 64), (70, 130), (300, 97)]:
+            game = GameOfLife(size, fill_rate=0.40)
+            packed = PackedGameOfLife(size, world=game.world)
+            for generation in range(40):
+                game.tick()
+                packed.tick()
+                np.testing.assert_array_equal(packed.world, game.world)
+
+    def test_visualize(self):
+        packed = PackedGameOfLife((40, 70), fill_rate=0.3)
+        visualization = 255 * np.ones(shape=(40, 70), dtype=np.uint8)
+        frame = np.zeros(shape=(40, 70), dtype=np.uint8)
+        for generation in range(10):
+            packed.tick()
+            visualization += (visualization < 255).astype(np.uint8)
+            visualization = visualization.clip(128, 255)
+            visualization[(packed.world == 1)] = 0
+            np.testing.assert_array_equal(packed.visualize(out=frame), visualization)
+
+    def test_memory(self):
+        packed = PackedGameOfLife((256, 1024))
+        self.assertEqual(packed.words.nbytes * 8, 256 * 1024)
+
+
+# endregion
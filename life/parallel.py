@@ -0,0 +1,217 @@
+import os
+import unittest
+import threading
+import multiprocessing
+import numpy as np
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Tuple
+
+from life import GameOfLife, GrayScottDiffusion
+
+
+def work(Game: type, kwargs: Dict, layouts: Dict[str, Tuple[str, str, tuple]], bounds: List[int], index: int,
+         generation, generations, parity, start, barrier, done):
+    memories = {field: SharedMemory(name=name) for field, (name, dtype, shape) in layouts.items()}
+    try:
+        buffers = {field: ParallelRunner.buffer(memories[field], dtype, shape)
+                   for field, (name, dtype, shape) in layouts.items()}
+        num_rows, num_columns = next(iter(buffers.values())).shape[1:]
+        first, last = bounds[index], bounds[index + 1]
+        low, high = max(first - 1, 0), min(last + 1, num_rows)
+        game = Game((high - low, num_columns), **kwargs)
+
+        while True:
+            start.wait()
+            if generations.value < 0:
+                break
+            current, game.generation = parity.value, generation.value
+            for field, buffer in buffers.items():
+                getattr(game, field)[:] = buffer[current, low:high]
+            for step in range(generations.value):
+                game.tick()
+                current ^= 1
+                for field, buffer in buffers.items():
+                    buffer[current, first:last] = getattr(game, field)[first - low:last - low]
+                barrier.wait()
+                for field, buffer in buffers.items():
+                    local = getattr(game, field)
+                    if low < first:
+                        local[0] = buffer[current, low]
+                    if high > last:
+                        local[-1] = buffer[current, high - 1]
+            done.wait()
+    except BaseException:
+        for synchronization in (start, barrier, done):
+            synchronization.abort()
+        raise
+    finally:
+        for memory in memories.values():
+            memory.close()
+
+
+class ParallelRunner:
+
+    Timeout = 10.0
+
+    def __init__(self, Game: type, size: tuple=(400, 400), num_workers: int=None, **kwargs):
+        if not getattr(Game, 'fields', None):
+            raise ValueError(f"{Game.__name__} can't be decomposed into strips")
+        num_workers = min(num_workers or os.cpu_count(), size[0])
+        self.game = Game(size, **kwargs)
+        self.parity = 0
+
+        self.memories, self.buffers, self.originals, self.workers = {}, {}, {}, []
+        try:
+            for field in Game.fields:
+                array = getattr(self.game, field)
+                if array is None:
+                    continue
+                self.originals[field] = array
+                self.memories[field] = SharedMemory(create=True, size=2 * array.nbytes)
+                self.buffers[field] = self.buffer(self.memories[field], array.dtype, array.shape)
+                self.buffers[field][self.parity] = array
+            self.expose()
+
+            bounds = np.linspace(0, size[0], num_workers + 1).astype(int).tolist()
+            layouts = {field: (self.memories[field].name, buffer.dtype.str, buffer.shape[1:])
+                       for field, buffer in self.buffers.items()}
+            self.counter = multiprocessing.Value('q', 0, lock=False)
+            self.generations = multiprocessing.Value('q', 0, lock=False)
+            self.current = multiprocessing.Value('b', 0, lock=False)
+            self.start = multiprocessing.Barrier(num_workers + 1)
+            self.barrier = multiprocessing.Barrier(num_workers)
+            self.done = multiprocessing.Barrier(num_workers + 1)
+            for index in range(num_workers):
+                worker = multiprocessing.Process(target=work, daemon=True,
+                                                 args=(Game, kwargs, layouts, bounds, index, self.counter,
+                                                       self.generations, self.current, self.start, self.barrier,
+                                                       self.done))
+                worker.start()
+                self.workers.append(worker)
+        except BaseException:
+            self.close()
+            raise
+
+    @staticmethod
+    def buffer(memory: SharedMemory, dtype: np.dtype, shape: tuple) -> np.ndarray:
+        return np.ndarray(shape=(2, *shape), dtype=dtype, buffer=memory.buf)
+
+    @property
+    def generation(self) -> int:
+        return self.game.generation
+
+    def expose(self):
+        for field, buffer in self.buffers.items():
+            setattr(self.game, field, buffer[self.parity])
+
+    def advance(self, generations: int):
+        self.counter.value, self.generations.value, self.current.value = self.generation, generations, self.parity
+        self.start.wait()
+        self.done.wait()
+        self.game.generation += generations
+        self.parity ^= generations & 1
+        self.expose()
+
+    def tick(self):
+        self.advance(1)
+
+    def visualize(self, out: np.ndarray=None) -> np.array:
+        return self.game.visualize(out)
+
+    def close(self):
+        try:
+            if self.workers:
+                self.generations.value = -1
+                stopped = all(worker.is_alive() for worker in self.workers)
+                if stopped:
+                    try:
+                        self.start.wait(timeout=self.Timeout)
+                    except threading.BrokenBarrierError:
+                        stopped = False
+                if not stopped:
+                    for worker in self.workers:
+                        worker.terminate()
+                for worker in self.workers:
+                    worker.join()
+                self.workers = []
+        finally:
+            for field, original in self.originals.items():
+                if field in self.buffers:
+                    np.copyto(original, self.buffers[field][self.parity])
+                setattr(self.game, field, original)
+            self.buffers.clear()
+            for memory in self.memories.values():
+                memory.close()
+                memory.unlink()
+            self.memories.clear()
+
+    def __enter__(self) -> 'ParallelRunner':
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+# region Unit Tests
+
+
+class TestParallelRunner(unittest.TestCase):
+
+    def test_game_of_life(self):
+        with ParallelRunner(GameOfLife, (120, 90), num_workers=3, fill_rate=0.35, history=True) as runner:
+            game = GameOfLife((120, 90), history=True)
+            game.world[:] = runner.game.world
+            for generations in [1, 2, 7, 20]:
+                runner.advance(generations)
+                for generation in range(generations):
+                    game.tick()
+                np.testing.assert_array_equal(runner.game.world, game.world)
+            np.testing.assert_array_equal(runner.visualize(), game.visualize())
+            runner.game.world[60:63, 40:43] = 1
+            game.world[60:63, 40:43] = 1
+            runner.tick()
+            game.tick()
+            np.testing.assert_array_equal(runner.game.world, game.world)
+        runner.game.advance(5)
+        game.advance(5)
+        np.testing.assert_array_equal(runner.game.world, game.world)
+
+    def test_gray_scott(self):
+        coeffs = (0.16, 0.08, 0.035, 0.065)
+        with ParallelRunner(GrayScottDiffusion, (100, 80), num_workers=4, coeffs=coeffs) as runner:
+            diffusion = GrayScottDiffusion((100, 80), coeffs=coeffs)
+            diffusion.u[:], diffusion.v[:] = runner.game.u, runner.game.v
+            runner.advance(25)
+            for generation in range(25):
+                diffusion.tick()
+            np.testing.assert_array_equal(runner.game.u, diffusion.u)
+            np.testing.assert_array_equal(runner.game.v, diffusion.v)
+        self.assertEqual(runner.game.v.shape, (100, 80))
+
+    def test_closed(self):
+        coeffs = (0.16, 0.08, 0.035, 0.065)
+        with ParallelRunner(GrayScottDiffusion, (60, 80), num_workers=2, coeffs=coeffs, fused=True) as runner:
+            diffusion = GrayScottDiffusion((60, 80), coeffs=coeffs, fused=True)
+            diffusion.u[:], diffusion.v[:] = runner.game.u, runner.game.v
+            runner.advance(10)
+        diffusion.advance(20)
+        runner.game.advance(10)
+        np.testing.assert_allclose(runner.game.u, diffusion.u, atol=1e-6)
+        np.testing.assert_allclose(runner.game.v, diffusion.v, atol=1e-6)
+
+    def test_crashed(self):
+        runner = ParallelRunner(GameOfLife, (60, 80), num_workers=2, fill_rate=0.3)
+        runner.advance(3)
+        names = [memory.name for memory in runner.memories.values()]
+        runner.workers[0].kill()
+        runner.workers[0].join()
+        runner.close()
+        self.assertEqual(runner.workers, [])
+        self.assertEqual(runner.memories, {})
+        for name in names:
+            with self.assertRaises(FileNotFoundError):
+                SharedMemory(name=name)
+        self.assertEqual(runner.game.world.shape, (60, 80))
+
+
+# endregion
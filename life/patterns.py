@@ -0,0 +1,236 @@
+import re
+import array
+import pathlib
+import tempfile
+import unittest
+import numpy as np
+from typing import Iterable, Iterator, List, Tuple
+
+from life import GameOfLife
+
+
+class Pattern:
+
+    Token = re.compile(r'(\d*)([a-zA-Z.$!])')
+    Header = re.compile(r'\s*(\w+)\s*=\s*([^,]+)')
+    Chunk = 1 << 20
+    Width = 70
+
+    def __init__(self, height: int, width: int, rows: np.ndarray, columns: np.ndarray, lengths: np.ndarray,
+                 rule: str='B3/S23', comments: List[str]=None):
+        self.height, self.width = height, width
+        self.rows, self.columns, self.lengths = rows, columns, lengths
+        self.rule = rule
+        self.comments = comments or []
+
+    @property
+    def population(self) -> int:
+        return int(self.lengths.sum())
+
+    @classmethod
+    def read(cls, path: pathlib.Path) -> 'Pattern':
+        path = pathlib.Path(path)
+        with path.open() as file:
+            if path.suffix.lower() == '.rle':
+                return cls.parse_rle(file)
+            return cls.parse_plaintext(file)
+
+    @classmethod
+    def build(cls, rows: array.array, columns: array.array, lengths: array.array,
+              height: int, width: int, rule: str, comments: List[str]) -> 'Pattern':
+        rows, columns, lengths = (np.frombuffer(values, dtype=np.int64) for values in (rows, columns, lengths))
+        if len(rows):
+            height = max(height, int(rows.max()) + 1)
+            width = max(width, int((columns + lengths).max()))
+        return cls(height, width, rows, columns, lengths, rule, comments)
+
+    @classmethod
+    def parse_rle(cls, lines: Iterable[str]) -> 'Pattern':
+        rows, columns, lengths = array.array('q'), array.array('q'), array.array('q')
+        height, width, rule, comments = 0, 0, 'B3/S23', []
+        row, column = 0, 0
+        for line in lines:
+            line = line.strip()
+            if line.startswith('#'):
+                comments.append(line)
+                continue
+            if line.startswith('x'):
+                header = dict(cls.Header.findall(line))
+                width, height = int(header.get('x', 0)), int(header.get('y', 0))
+                rule = header.get('rule', rule).strip()
+                continue
+            for count, tag in cls.Token.findall(line):
+                count = int(count) if count else 1
+                if tag == '!':
+                    return cls.build(rows, columns, lengths, height, width, rule, comments)
+                if tag == '$':
+                    row, column = row + count, 0
+                elif tag in 'b.':
+                    column += count
+                else:
+                    rows.append(row)
+                    columns.append(column)
+                    lengths.append(count)
+                    column += count
+        return cls.build(rows, columns, lengths, height, width, rule, comments)
+
+    @classmethod
+    def parse_plaintext(cls, lines: Iterable[str]) -> 'Pattern':
+        rows, columns, lengths = array.array('q'), array.array('q'), array.array('q')
+        comments, row, width = [], 0, 0
+        for line in lines:
+            line = line.rstrip('\r\n')
+            if line.startswith('!'):
+                comments.append(line)
+                continue
+            width = max(width, len(line))
+            cells = np.frombuffer(line.encode(), dtype=np.uint8)
+            alive = np.zeros(shape=len(cells) + 2, dtype=np.int8)
+            alive[1:-1] = (cells == ord('O')) | (cells == ord('*'))
+            edges = np.diff(alive)
+            starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+            rows.extend([row] * len(starts))
+            columns.extend(starts.tolist())
+            lengths.extend((ends - starts).tolist())
+            row += 1
+        return cls.build(rows, columns, lengths, row, width, 'B3/S23', comments)
+
+    @classmethod
+    def from_world(cls, world: np.ndarray, bounding: bool=True, rule: str='B3/S23') -> 'Pattern':
+        if bounding:
+            alive_rows, alive_columns = np.flatnonzero(world.any(axis=1)), np.flatnonzero(world.any(axis=0))
+            if len(alive_rows) == 0:
+                return cls(0, 0, *(np.zeros(0, dtype=np.int64) for values in range(3)), rule)
+            world = world[alive_rows[0]:alive_rows[-1] + 1, alive_columns[0]:alive_columns[-1] + 1]
+        padded = np.zeros(shape=(world.shape[0], world.shape[1] + 2), dtype=np.int8)
+        padded[:, 1:-1] = world != 0
+        edges = np.diff(padded, axis=1)
+        rows, starts = np.nonzero(edges == 1)
+        ends = np.nonzero(edges == -1)[1]
+        return cls(world.shape[0], world.shape[1], rows.astype(np.int64), starts.astype(np.int64),
+                   (ends - starts).astype(np.int64), rule)
+
+    def place(self, world: np.ndarray, origin: Tuple[int, int]=None, value: int=1):
+        if origin is None:
+            origin = ((world.shape[0] - self.height) // 2, (world.shape[1] - self.width) // 2)
+        for first in range(0, len(self.lengths), self.Chunk):
+            runs = slice(first, first + self.Chunk)
+            lengths = self.lengths[runs]
+            offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            rows = origin[0] + np.repeat(self.rows[runs], lengths)
+            columns = origin[1] + np.repeat(self.columns[runs], lengths) + offsets
+            inside = (rows >= 0) & (rows < world.shape[0]) & (columns >= 0) & (columns < world.shape[1])
+            world[rows[inside], columns[inside]] = value
+
+    def to_world(self) -> np.ndarray:
+        world = np.zeros(shape=(self.height, self.width), dtype=np.uint8)
+        self.place(world, origin=(0, 0))
+        return world
+
+    def game(self, size: tuple=None, origin: Tuple[int, int]=None) -> GameOfLife:
+        size = size or (self.height + 2, self.width + 2)
+        game = GameOfLife(size, fill_rate=0.0, rule=self.rule)
+        self.place(game.world, origin)
+        return game
+
+    def rle(self) -> Iterator[str]:
+        for comment in self.comments:
+            yield comment
+        yield f"x = {self.width}, y = {self.height}, rule = {self.rule}"
+        line, row, column = '', 0, 0
+        tokens = []
+        for run_row, run_column, length in zip(self.rows.tolist(), self.columns.tolist(), self.lengths.tolist()):
+            if run_row > row:
+                tokens.append(f"{run_row - row if run_row - row > 1 else ''}$")
+                row, column = run_row, 0
+            if run_column > column:
+                tokens.append(f"{run_column - column if run_column - column > 1 else ''}b")
+            tokens.append(f"{length if length > 1 else ''}o")
+            column = run_column + length
+            if len(tokens) > self.Width:
+                for token in tokens:
+                    if len(line) + len(token) > self.Width:
+                        yield line
+                        line = ''
+                    line += token
+                tokens = []
+        for token in tokens + ['!']:
+            if len(line) + len(token) > self.Width:
+                yield line
+                line = ''
+            line += token
+        yield line
+
+    def plaintext(self) -> Iterator[str]:
+        for comment in self.comments:
+            yield comment
+        runs = np.searchsorted(self.rows, np.arange(self.height + 1))
+        for row in range(self.height):
+            cells = np.full(shape=self.width, fill_value=ord('.'), dtype=np.uint8)
+            for column, length in zip(self.columns[runs[row]:runs[row + 1]], self.lengths[runs[row]:runs[row + 1]]):
+                cells[column:column + length] = ord('O')
+            yield cells.tobytes().decode()
+
+    def write(self, path: pathlib.Path):
+        path = pathlib.Path(path)
+        lines = self.rle() if path.suffix.lower() == '.rle' else self.plaintext()
+        with path.open('w') as file:
+            for line in lines:
+                file.write(line + '\n')
+
+
+# region Unit Tests
+
+
+class TestPattern(unittest.TestCase):
+
+    Glider = "#N Glider\nx = 3, y = 3, rule = B3/S23\nbob$2bo$3o!\n"
+    Gun = """#N Gosper glider gun
+x = 36, y = 9, rule = B3/S23
+24bo$22bobo$12b2o6b2o12b2o$11bo3bo4b2o12b2o$2o8bo5bo3b2o$2o8bo3bob2o4b
+obo$10bo5bo7bo$11bo3bo$12b2o!
+"""
+
+    def test_rle(self):
+        glider = Pattern.parse_rle(self.Glider.splitlines())
+        np.testing.assert_array_equal(glider.to_world(), [[0, 1, 0], [0, 0, 1], [1, 1, 1]])
+        self.assertEqual(glider.comments, ["#N Glider"])
+        gun = Pattern.parse_rle(self.Gun.splitlines())
+        self.assertEqual((gun.height, gun.width, gun.population), (9, 36, 36))
+        self.assertEqual(list(gun.rle())[1:], self.Gun.splitlines()[1:])
+
+    def test_plaintext(self):
+        lines = ["!Name: Glider", ".O.", "..O", "OOO"]
+        glider = Pattern.parse_plaintext(lines)
+        np.testing.assert_array_equal(glider.to_world(), [[0, 1, 0], [0, 0, 1], [1, 1, 1]])
+        self.assertEqual(list(glider.plaintext()), lines)
+
+    def test_gun(self):
+        game = Pattern.parse_rle(self.Gun.splitlines()).game((120, 120), origin=(10, 10))
+        game.advance(120)
+        self.assertEqual(game.world.sum(), 36 + 4 * 5)
+
+    def test_files(self):
+        world = (np.random.random(size=(300, 500)) < 0.2).astype(np.uint8)
+        world[:5], world[:, -7:] = 0, 0
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ['world.rle', 'world.cells']:
+                path = pathlib.Path(directory) / name
+                Pattern.from_world(world).write(path)
+                pattern = Pattern.read(path)
+                self.assertEqual((pattern.height, pattern.width), (295, 493))
+                placed = np.zeros_like(world)
+                pattern.place(placed, origin=(5, 0))
+                np.testing.assert_array_equal(placed, world)
+            full = Pattern.from_world(world, bounding=False)
+            self.assertEqual((full.height, full.width), world.shape)
+            np.testing.assert_array_equal(full.to_world(), world)
+            for name in ['full.rle', 'full.cells']:
+                path = pathlib.Path(directory) / name
+                full.write(path)
+                pattern = Pattern.read(path)
+                self.assertEqual((pattern.height, pattern.width), world.shape)
+                np.testing.assert_array_equal(pattern.to_world(), world)
+
+
+# endregion
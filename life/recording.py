@@ -0,0 +1,369 @@
+import os
+import json
+import uuid
+import zlib
+import queue
+import pathlib
+import tempfile
+import threading
+import unittest
+from unittest import mock
+import numpy as np
+from typing import Dict, Iterator, Tuple
+
+from life import GameOfLife, GrayScottDiffusion
+from tiled import TiledGameOfLife
+from spectral import SpectralGrayScottDiffusion
+
+
+class Checkpoint:
+
+    Engines = {Game.__name__: Game for Game in (GameOfLife, TiledGameOfLife,
+                                                GrayScottDiffusion, SpectralGrayScottDiffusion)}
+    Arrays = ('world', 'seen', 'u', 'v')
+    Metadata = 'checkpoint.json'
+
+    @staticmethod
+    def arguments(game) -> Dict:
+        if isinstance(game, SpectralGrayScottDiffusion):
+            return {'coeffs': [game.cu, game.cv, game.f, game.k], 'dt': game.dt}
+        if isinstance(game, GrayScottDiffusion):
+            return {'coeffs': [game.cu, game.cv, game.f, game.k], 'fused': game.fused}
+        arguments = {'fill_rate': 0.0, 'rule': game.rulestring, 'history': game.seen is not None}
+        if isinstance(game, TiledGameOfLife):
+            arguments['tile'] = game.tile
+        return arguments
+
+    @classmethod
+    def save(cls, game, directory: pathlib.Path):
+        name = type(game).__name__
+        if name not in cls.Engines:
+            raise ValueError(f"{name} can't be checkpointed")
+        directory = pathlib.Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        arrays = [array for array in cls.Arrays if getattr(game, array, None) is not None]
+        token = f"{game.generation}-{uuid.uuid4().hex[:8]}"
+        files = {array: f"{array}-{token}.npy" for array in arrays}
+        previous = {}
+        if (directory / cls.Metadata).exists():
+            with (directory / cls.Metadata).open() as file:
+                previous = json.load(file)['files']
+        try:
+            for array, filename in files.items():
+                with open(directory / filename, 'wb') as file:
+                    np.save(file, getattr(game, array))
+                    file.flush()
+                    os.fsync(file.fileno())
+            metadata = {'engine': name, 'generation': game.generation,
+                        'size': list(getattr(game, arrays[0]).shape), 'arguments': cls.arguments(game),
+                        'arrays': arrays, 'files': files}
+            with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False) as file:
+                json.dump(metadata, file, indent=2)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(file.name, directory / cls.Metadata)
+        except BaseException:
+            for filename in files.values():
+                (directory / filename).unlink(missing_ok=True)
+            raise
+        for filename in previous.values():
+            if filename not in files.values():
+                (directory / filename).unlink(missing_ok=True)
+
+    @classmethod
+    def open(cls, directory: pathlib.Path) -> Tuple[Dict, Dict[str, np.memmap]]:
+        directory = pathlib.Path(directory)
+        with (directory / cls.Metadata).open() as file:
+            metadata = json.load(file)
+        return metadata, {array: np.load(directory / metadata['files'][array], mmap_mode='r')
+                          for array in metadata['arrays']}
+
+    @classmethod
+    def load(cls, directory: pathlib.Path):
+        metadata, arrays = cls.open(directory)
+        arguments = dict(metadata['arguments'])
+        if 'coeffs' in arguments:
+            arguments['coeffs'] = tuple(arguments['coeffs'])
+        game = cls.Engines[metadata['engine']](tuple(metadata['size']), **arguments)
+        for array, mapped in arrays.items():
+            getattr(game, array)[:] = mapped
+        if isinstance(game, TiledGameOfLife):
+            game.touch()
+        game.generation = metadata['generation']
+        return game
+
+
+class Recorder:
+
+    Header = 'recording.json'
+    Data = 'recording.bin'
+    Index = 'recording.idx'
+    Entry = np.dtype([('generation', '<i8'), ('offset', '<i8'), ('length', '<i8'), ('keyframe', '<i8')])
+
+    def __init__(self, directory: pathlib.Path, shape: tuple, bits: bool=False, keyframes: int=100,
+                 level: int=1, threaded: bool=True, capacity: int=16):
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.shape, self.bits, self.keyframes, self.level = tuple(shape), bits, keyframes, level
+        header = {'shape': list(self.shape), 'bits': bits, 'keyframes': keyframes}
+        path = self.directory / self.Header
+        if path.exists():
+            with path.open() as file:
+                if json.load(file) != header:
+                    raise ValueError(f"{self.directory} holds a recording with a different header")
+        else:
+            with path.open('w') as file:
+                json.dump(header, file, indent=2)
+
+        index = Player.entries(self.directory)
+        end = int(index['offset'][-1] + index['length'][-1]) if len(index) else 0
+        with open(self.directory / self.Data, 'ab') as data:
+            data.truncate(end)
+        with open(self.directory / self.Index, 'ab') as file:
+            file.truncate(len(index) * self.Entry.itemsize)
+        self.data = open(self.directory / self.Data, 'ab')
+        self.index = open(self.directory / self.Index, 'ab')
+        self.offset, self.count, self.previous = end, len(index), None
+        self.error = None
+
+        self.queue = queue.Queue(maxsize=capacity) if threaded else None
+        self.writer = None
+        if threaded:
+            self.writer = threading.Thread(target=self.drain, daemon=True)
+            self.writer.start()
+
+    def record(self, frame: np.ndarray, generation: int):
+        assert frame.shape == self.shape
+        self.check()
+        if self.queue is None:
+            self.write(frame, generation)
+        else:
+            self.queue.put((frame.copy(), generation))
+
+    def check(self):
+        if self.error is not None:
+            raise self.error
+
+    def drain(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is not None and self.error is None:
+                    self.write(*item)
+            except BaseException as exception:
+                self.error = exception
+            finally:
+                self.queue.task_done()
+            if item is None:
+                break
+
+    def write(self, frame: np.ndarray, generation: int):
+        data = np.packbits(frame) if self.bits else np.ascontiguousarray(frame, dtype=np.uint8).ravel()
+        keyframe = self.previous is None or self.count % self.keyframes == 0
+        delta = data if keyframe else np.bitwise_xor(data, self.previous)
+        payload = zlib.compress(delta.tobytes(), self.level)
+        self.data.write(payload)
+        entry = np.array([(generation, self.offset, len(payload), keyframe)], dtype=self.Entry)
+        self.index.write(entry.tobytes())
+        self.offset, self.count, self.previous = self.offset + len(payload), self.count + 1, data
+
+    def flush(self):
+        if self.queue is not None:
+            self.queue.join()
+        self.check()
+        self.data.flush()
+        self.index.flush()
+
+    def close(self):
+        if self.writer is not None:
+            self.queue.put(None)
+            self.writer.join()
+            self.writer = None
+        self.data.close()
+        self.index.close()
+        self.check()
+
+    def __enter__(self) -> 'Recorder':
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+class Player:
+
+    def __init__(self, directory: pathlib.Path):
+        self.directory = pathlib.Path(directory)
+        with (self.directory / Recorder.Header).open() as file:
+            header = json.load(file)
+        self.shape, self.bits = tuple(header['shape']), header['bits']
+        self.index = self.entries(self.directory)
+        self.data = np.memmap(self.directory / Recorder.Data, dtype=np.uint8, mode='r') \
+            if len(self.index) else np.zeros(0, dtype=np.uint8)
+        self.keyframes = np.flatnonzero(self.index['keyframe'])
+
+    @staticmethod
+    def entries(directory: pathlib.Path) -> np.ndarray:
+        path = pathlib.Path(directory) / Recorder.Index
+        if not path.exists():
+            return np.zeros(0, dtype=Recorder.Entry)
+        raw = path.read_bytes()
+        index = np.frombuffer(raw[:len(raw) - len(raw) % Recorder.Entry.itemsize], dtype=Recorder.Entry)
+        data = pathlib.Path(directory) / Recorder.Data
+        size = data.stat().st_size if data.exists() else 0
+        complete = index['offset'] + index['length'] <= size
+        return index[:np.argmin(complete) if not complete.all() else len(index)]
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def generations(self) -> np.ndarray:
+        return self.index['generation']
+
+    def decode(self, position: int) -> np.ndarray:
+        entry = self.index[position]
+        payload = self.data[entry['offset']:entry['offset'] + entry['length']]
+        return np.frombuffer(zlib.decompress(payload), dtype=np.uint8)
+
+    def frame(self, data: np.ndarray) -> np.ndarray:
+        if self.bits:
+            return np.unpackbits(data, count=int(np.prod(self.shape))).reshape(self.shape)
+        return data.reshape(self.shape)
+
+    def __getitem__(self, position: int) -> np.ndarray:
+        position = range(len(self))[position]
+        keyframe = self.keyframes[np.searchsorted(self.keyframes, position, side='right') - 1]
+        data = self.decode(keyframe)
+        for delta in range(keyframe + 1, position + 1):
+            data = np.bitwise_xor(data, self.decode(delta))
+        return self.frame(data)
+
+    def __iter__(self) -> Iterator[Tuple[int, np.ndarray]]:
+        data = None
+        for position, entry in enumerate(self.index):
+            delta = self.decode(position)
+            data = delta if entry['keyframe'] else np.bitwise_xor(data, delta)
+            yield int(entry['generation']), self.frame(data)
+
+
+# region Unit Tests
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def test_game_of_life(self):
+        game = GameOfLife((60, 70), fill_rate=0.3, history=True)
+        game.advance(10)
+        with tempfile.TemporaryDirectory() as directory:
+            Checkpoint.save(game, directory)
+            metadata, arrays = Checkpoint.open(directory)
+            self.assertIsInstance(arrays['world'], np.memmap)
+            restored = Checkpoint.load(directory)
+        game.advance(20)
+        restored.advance(20)
+        self.assertEqual(restored.generation, 30)
+        np.testing.assert_array_equal(restored.world, game.world)
+        np.testing.assert_array_equal(restored.visualize(), game.visualize())
+
+    def test_consistent(self):
+        game = TiledGameOfLife((40, 50), fill_rate=0.3, history=True, tile=8)
+        with tempfile.TemporaryDirectory() as directory:
+            foreign = pathlib.Path(directory) / 'results.npy'
+            np.save(foreign, np.arange(3))
+            Checkpoint.save(game, directory)
+            saved = game.world.copy(), game.seen.copy()
+            game.advance(5)
+            Checkpoint.save(game, directory)
+            self.assertEqual(len(list(pathlib.Path(directory).glob('*.npy'))), 3)
+            game.advance(5)
+            with mock.patch.object(os, 'replace', side_effect=OSError):
+                with self.assertRaises(OSError):
+                    Checkpoint.save(game, directory)
+            restored = Checkpoint.load(directory)
+            self.assertEqual((restored.generation, restored.tile), (5, 8))
+            Checkpoint.save(game, directory)
+            self.assertEqual(len(list(pathlib.Path(directory).glob('*.npy'))), 3)
+            np.testing.assert_array_equal(np.load(foreign), np.arange(3))
+        game = TiledGameOfLife((40, 50), history=True, tile=8)
+        game.world[:], game.seen[:] = saved
+        game.advance(5)
+        np.testing.assert_array_equal(restored.world, game.world)
+        np.testing.assert_array_equal(restored.seen, game.seen)
+
+    def test_gray_scott(self):
+        for diffusion in [GrayScottDiffusion((40, 50), coeffs=(0.16, 0.08, 0.035, 0.065), fused=True),
+                          SpectralGrayScottDiffusion((40, 50), coeffs=(0.16, 0.08, 0.050, 0.065), dt=2.0)]:
+            diffusion.advance(5)
+            with tempfile.TemporaryDirectory() as directory:
+                Checkpoint.save(diffusion, directory)
+                restored = Checkpoint.load(directory)
+            self.assertIs(type(restored), type(diffusion))
+            diffusion.advance(10)
+            restored.advance(10)
+            np.testing.assert_array_equal(restored.u, diffusion.u)
+            np.testing.assert_array_equal(restored.v, diffusion.v)
+
+
+class TestRecorder(unittest.TestCase):
+
+    def test_playback(self):
+        game = GameOfLife((50, 90), fill_rate=0.3)
+        worlds = []
+        with tempfile.TemporaryDirectory() as directory:
+            with Recorder(directory, game.world.shape, bits=True, keyframes=8) as recorder:
+                for generation in range(30):
+                    recorder.record(game.world, game.generation)
+                    worlds.append(game.world.copy())
+                    game.tick()
+            with Recorder(directory, game.world.shape, bits=True, keyframes=8, threaded=False) as recorder:
+                for generation in range(5):
+                    recorder.record(game.world, game.generation)
+                    worlds.append(game.world.copy())
+                    game.tick()
+
+            player = Player(directory)
+            self.assertEqual(len(player), 35)
+            self.assertEqual(player.generations.tolist(), [*range(35)])
+            for position in [0, 7, 8, 21, 29, 30, 34, -1]:
+                np.testing.assert_array_equal(player[position], worlds[position])
+            for (generation, frame), world in zip(player, worlds):
+                np.testing.assert_array_equal(frame, world)
+            self.assertLess(player.data.size, sum(world.size for world in worlds) // 8)
+
+    def test_truncated(self):
+        frames = [np.random.randint(0, 256, size=(16, 24), dtype=np.uint8) for frame in range(6)]
+        with tempfile.TemporaryDirectory() as directory:
+            with Recorder(directory, (16, 24), keyframes=4) as recorder:
+                for generation, frame in enumerate(frames):
+                    recorder.record(frame, generation)
+                recorder.flush()
+                self.assertEqual(len(Player(directory)), 6)
+            path = pathlib.Path(directory) / Recorder.Data
+            with open(path, 'r+b') as data:
+                data.truncate(path.stat().st_size - 1)
+            self.assertEqual(len(Player(directory)), 5)
+            with Recorder(directory, (16, 24), keyframes=4) as recorder:
+                recorder.record(frames[5], 5)
+            player = Player(directory)
+            self.assertEqual(len(player), 6)
+            for position, frame in enumerate(frames):
+                np.testing.assert_array_equal(player[position], frame)
+
+    def test_failed(self):
+        frame = np.ones(shape=(16, 24), dtype=np.uint8)
+        with tempfile.TemporaryDirectory() as directory:
+            recorder = Recorder(directory, (16, 24), capacity=2)
+            with mock.patch.object(zlib, 'compress', side_effect=OSError):
+                recorder.record(frame, 0)
+                with self.assertRaises(OSError):
+                    recorder.flush()
+                with self.assertRaises(OSError):
+                    for generation in range(1, 10):
+                        recorder.record(frame, generation)
+            with self.assertRaises(OSError):
+                recorder.close()
+            self.assertIsNone(recorder.writer)
+
+
+# endregion
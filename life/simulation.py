@@ -0,0 +1,215 @@
+import time
+import threading
+import unittest
+import numpy as np
+from typing import Optional, Tuple
+
+from life import GameOfLife, GrayScottDiffusion
+from cycles import Cycles
+
+
+class Frames:
+
+    def __init__(self, shape: tuple, capacity: int=3):
+        assert capacity >= 3
+        self.buffers = [np.zeros(shape=shape, dtype=np.uint8) for buffer in range(capacity)]
+        self.generations = [0] * capacity
+        self.lock = threading.Lock()
+        self.writing, self.latest, self.reading = 0, None, None
+        self.published, self.dropped = 0, 0
+
+    def acquire(self) -> np.ndarray:
+        with self.lock:
+            index = self.writing
+            while index in (self.latest, self.reading):
+                index = (index + 1) % len(self.buffers)
+            self.writing = index
+            return self.buffers[index]
+
+    def publish(self, generation: int):
+        with self.lock:
+            if self.latest is not None:
+                self.dropped += 1
+            self.generations[self.writing] = generation
+            self.latest, self.published = self.writing, self.published + 1
+            self.writing = (self.writing + 1) % len(self.buffers)
+
+    def consume(self) -> Optional[Tuple[int, np.ndarray, int]]:
+        with self.lock:
+            if self.latest is None:
+                return None
+            self.reading, self.latest = self.latest, None
+            return self.reading, self.buffers[self.reading], self.generations[self.reading]
+
+
+class Simulation(threading.Thread):
+
+    Rate = 30
+    Budget = 0.9
+
+    def __init__(self, game, frames: Frames, cycles: Cycles=None):
+        super(Simulation, self).__init__(daemon=True)
+        self.game, self.frames, self.cycles = game, frames, cycles
+        self.detecting = cycles is not None and cycles.supports(game)
+        self.pending = None
+        self.steps = 1
+        self.lock = threading.Lock()
+        self.running, self.stopped = threading.Event(), threading.Event()
+        self.running.set()
+
+    def switch(self, game):
+        with self.lock:
+            self.pending = game
+
+    def pause(self):
+        self.running.clear()
+
+    def resume(self):
+        self.running.set()
+
+    def stop(self):
+        self.stopped.set()
+        self.running.set()
+
+    def advance(self, game):
+        if not self.detecting:
+            game.advance(self.steps)
+            return
+        for step in range(self.steps):
+            if self.cycles.observe(game) is not None:
+                self.detecting = False
+                self.pause()
+                return
+            game.tick()
+
+    def run(self):
+        period = 1 / self.Rate
+        deadline = time.perf_counter()
+        while not self.stopped.is_set():
+            running = self.running.wait(timeout=period)
+            with self.lock:
+                switched = self.pending is not None
+                if switched:
+                    self.game, self.pending, self.steps = self.pending, None, 1
+                    self.detecting = self.cycles is not None and self.cycles.supports(self.game)
+                    if self.detecting:
+                        self.cycles.reset()
+            if not (running or switched):
+                continue
+            game = self.game
+            if running:
+                start = time.perf_counter()
+                self.advance(game)
+                elapsed = time.perf_counter() - start
+                budget = self.Budget * period
+                self.steps = max(1, min(2 * self.steps, int(self.steps * budget / max(elapsed, 1e-6))))
+            game.visualize(out=self.frames.acquire())
+            self.frames.publish(game.generation)
+
+            deadline = max(deadline + period, time.perf_counter() - period)
+            time.sleep(max(0.0, deadline - time.perf_counter()))
+
+
+# region Unit Tests
+
+
+class TestFrames(unittest.TestCase):
+
+    def test_ring(self):
+        frames = Frames((4, 4))
+        self.assertIsNone(frames.consume())
+        for generation in range(1, 6):
+            frames.acquire()[:] = generation
+            frames.publish(generation)
+        index, frame, generation = frames.consume()
+        self.assertEqual(generation, 5)
+        self.assertTrue(np.all(frame == 5))
+        self.assertEqual(frames.dropped, 4)
+        for generation in range(6, 12):
+            buffer = frames.acquire()
+            self.assertIsNot(buffer, frame)
+            buffer[:] = generation
+            frames.publish(generation)
+        self.assertTrue(np.all(frame == 5))
+        self.assertEqual(frames.consume()[2], 11)
+        self.assertIsNone(frames.consume())
+
+
+class TestSimulation(unittest.TestCase):
+
+    @staticmethod
+    def wait(frames: Frames) -> Tuple[int, np.ndarray, int]:
+        for attempt in range(200):
+            frame = frames.consume()
+            if frame is not None:
+                return frame
+            time.sleep(0.01)
+        raise TimeoutError
+
+    def test_controls(self):
+        frames = Frames((64, 64))
+        simulation = Simulation(GameOfLife((64, 64)), frames)
+        simulation.start()
+        try:
+            self.assertGreater(self.wait(frames)[2], 0)
+            simulation.pause()
+            time.sleep(0.1)
+            frames.consume()
+            generation = simulation.game.generation
+            time.sleep(0.1)
+            self.assertIsNone(frames.consume())
+            self.assertEqual(simulation.game.generation, generation)
+
+            diffusion = GrayScottDiffusion((64, 64), fused=True)
+            simulation.switch(diffusion)
+            self.assertEqual(self.wait(frames)[2], 0)
+            self.assertIs(simulation.game, diffusion)
+            simulation.resume()
+            self.assertGreater(self.wait(frames)[2], 0)
+        finally:
+            simulation.stop()
+            simulation.join(timeout=5)
+        self.assertFalse(simulation.is_alive())
+
+    def test_cycles(self):
+        game = GameOfLife((32, 32), fill_rate=0.0)
+        game.world[5:8, 6] = 1
+        frames, cycles = Frames((32, 32)), Cycles()
+        simulation = Simulation(game, frames, cycles)
+        simulation.start()
+        try:
+            for attempt in range(200):
+                if not simulation.running.is_set():
+                    break
+                time.sleep(0.01)
+            self.assertEqual(cycles.period, 2)
+            self.assertFalse(simulation.running.is_set())
+            self.assertEqual(game.generation, 2)
+            self.assertFalse(simulation.detecting)
+
+            simulation.resume()
+            generations = [self.wait(frames)[2] for attempt in range(4)]
+            self.assertEqual(generations, sorted(generations))
+            self.assertGreater(generations[-1], 4)
+            self.assertTrue(simulation.running.is_set())
+
+            simulation.pause()
+            time.sleep(0.1)
+            frames.consume()
+            diffusion = GrayScottDiffusion((32, 32), fused=True)
+            simulation.switch(diffusion)
+            self.assertEqual(self.wait(frames)[2], 0)
+            simulation.resume()
+            self.assertGreater(self.wait(frames)[2], 0)
+            self.assertTrue(simulation.is_alive())
+            self.assertFalse(simulation.detecting)
+
+            simulation.switch(GameOfLife((32, 32)))
+            self.wait(frames)
+            self.assertTrue(simulation.detecting)
+        finally:
+            simulation.stop()
+            simulation.join(timeout=5)
+
+
+# endregion
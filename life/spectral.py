@@ -0,0 +1,76 @@
+import unittest
+import numpy as np
+
+from life import GrayScottDiffusion
+
+
+class SpectralGrayScottDiffusion(GrayScottDiffusion):
+
+    fields = None
+
+    def __init__(self, size: tuple=(400, 400), coeffs: dict=None, dt: float=5.0):
+        super(SpectralGrayScottDiffusion, self).__init__(size, coeffs)
+        self.dt = dt
+        self.uv = np.stack([self.u, self.v])
+        self.u, self.v = self.uv
+        self.reaction = np.zeros_like(self.uv)
+        rows = 2 * np.cos(2 * np.pi * np.fft.fftfreq(size[0]))[:, np.newaxis]
+        columns = 2 * np.cos(2 * np.pi * np.fft.rfftfreq(size[1]))[np.newaxis, :]
+        laplace = rows + columns - 4
+        diffusion = np.array([self.cu, self.cv]).reshape(2, 1, 1)
+        self.implicit = 1 / (1 - dt * diffusion * laplace)
+
+    def tick(self):
+        u, v = self.uv
+        du, dv = self.reaction
+        np.multiply(u, v, out=dv)
+        np.multiply(dv, v, out=dv)
+        np.subtract(1, u, out=du)
+        np.multiply(du, self.f, out=du)
+        np.subtract(du, dv, out=du)
+        np.add(dv, (-self.f - self.k) * v, out=dv)
+        self.reaction *= self.dt
+        self.reaction += self.uv
+        spectrum = np.fft.rfft2(self.reaction)
+        spectrum *= self.implicit
+        self.uv[:] = np.fft.irfft2(spectrum, s=self.uv.shape[1:])
+        self.generation += 1
+
+
+# region Unit Tests
+
+
+class TestSpectralGrayScottDiffusion(unittest.TestCase):
+
+    Coeffs = (0.16, 0.08, 0.050, 0.065)
+
+    @staticmethod
+    def reference(u: np.ndarray, v: np.ndarray, coeffs: tuple, dt: float):
+        cu, cv, f, k = coeffs
+        laplace_u = np.roll(u, 1, 0) + np.roll(u, -1, 0) + np.roll(u, 1, 1) + np.roll(u, -1, 1) - 4 * u
+        laplace_v = np.roll(v, 1, 0) + np.roll(v, -1, 0) + np.roll(v, 1, 1) + np.roll(v, -1, 1) - 4 * v
+        uvv = u * v * v
+        return u + dt * (cu * laplace_u - uvv + f * (1 - u)), v + dt * (cv * laplace_v + uvv - (f + k) * v)
+
+    def test_accuracy(self):
+        spectral = SpectralGrayScottDiffusion((64, 96), self.Coeffs, dt=0.1)
+        u, v = spectral.u.copy(), spectral.v.copy()
+        for generation in range(200):
+            spectral.tick()
+            u, v = self.reference(u, v, self.Coeffs, dt=0.1)
+        np.testing.assert_allclose(spectral.u, u, atol=1e-3)
+        np.testing.assert_allclose(spectral.v, v, atol=1e-3)
+
+    def test_stability(self):
+        spectral = SpectralGrayScottDiffusion((64, 64), self.Coeffs, dt=10.0)
+        u, v = spectral.u.copy(), spectral.v.copy()
+        spectral.advance(100)
+        with np.errstate(all='ignore'):
+            for generation in range(100):
+                u, v = self.reference(u, v, self.Coeffs, dt=10.0)
+        self.assertTrue(np.all(np.isfinite(spectral.uv)))
+        self.assertTrue(np.all((spectral.uv > -0.1) & (spectral.uv < 1.1)))
+        self.assertFalse(np.all(np.isfinite(u)) and np.all(np.abs(u) < 10))
+
+
+# endregion
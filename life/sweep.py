@@ -0,0 +1,170 @@
+import sys
+import csv
+import json
+import pathlib
+import argparse
+import tempfile
+import unittest
+import numpy as np
+from typing import List, Tuple, Dict
+
+from life import GrayScottDiffusion
+
+
+class GrayScottSweep:
+
+    Cells = 1 << 15
+    Columns = ['generation', 'index', 'cu', 'cv', 'f', 'k', 'mean', 'std', 'min', 'max', 'change']
+
+    def __init__(self, size: tuple=(128, 128), parameters: List[Tuple[float, float, float, float]]=None,
+                 dtype: type=np.float32):
+        self.size = size
+        parameters = [GrayScottDiffusion.Coeffs] if parameters is None else parameters
+        self.parameters = np.array(parameters, dtype=np.double).reshape(-1, 4)
+        num_parameters = len(self.parameters)
+        self.uv = np.zeros(shape=(2, num_parameters, *size), dtype=dtype)
+        self.u, self.v = self.uv
+        for index, coeffs in enumerate(self.parameters):
+            diffusion = GrayScottDiffusion(size, coeffs=tuple(coeffs))
+            self.u[index], self.v[index] = diffusion.u, diffusion.v
+
+        cu, cv, f, k = (self.parameters[:, column].astype(dtype).reshape(-1, 1, 1) for column in range(4))
+        self.diffusion = np.stack([cu, cv])
+        self.f, self.k = f, k
+        per_chunk = max(1, self.Cells // (size[0] * size[1]))
+        self.chunks = [slice(first, min(first + per_chunk, num_parameters))
+                       for first in range(0, num_parameters, per_chunk)]
+        self.kernels = {length: GrayScottDiffusion.Kernel((length, *size), dtype)
+                        for length in {chunk.stop - chunk.start for chunk in self.chunks}}
+        self.previous = self.v.copy()
+        self.generation = 0
+
+    @staticmethod
+    def grid(fs: np.ndarray, ks: np.ndarray, cu: float=0.16, cv: float=0.08) -> List[Tuple[float, ...]]:
+        return [(cu, cv, f, k) for f in fs for k in ks]
+
+    def tick(self):
+        for chunk in self.chunks:
+            kernel = self.kernels[chunk.stop - chunk.start]
+            kernel(self.uv[:, chunk], self.diffusion[:, chunk], self.f[chunk], self.k[chunk])
+        self.generation += 1
+
+    def advance(self, generations: int):
+        for generation in range(generations):
+            self.tick()
+
+    def summary(self) -> List[Dict]:
+        axes = (1, 2)
+        means, stds = self.v.mean(axis=axes), self.v.std(axis=axes)
+        minimums, maximums = self.v.min(axis=axes), self.v.max(axis=axes)
+        changes = np.abs(self.v - self.previous).mean(axis=axes)
+        np.copyto(self.previous, self.v)
+        return [dict(zip(self.Columns, [self.generation, index, *coeffs, means[index], stds[index],
+                                        minimums[index], maximums[index], changes[index]]))
+                for index, coeffs in enumerate(self.parameters.tolist())]
+
+    def snapshot(self, directory: pathlib.Path):
+        path = pathlib.Path(directory) / f"snapshot-{self.generation:08d}.npz"
+        np.savez_compressed(path, generation=self.generation, parameters=self.parameters,
+                            u=self.u.astype(np.float16), v=self.v.astype(np.float16))
+
+    def run(self, directory: pathlib.Path, generations: int, every: int=1000, verbose: bool=False) -> int:
+        directory = pathlib.Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        with (directory / 'parameters.json').open('w') as file:
+            json.dump({'size': list(self.size), 'dtype': self.uv.dtype.name,
+                       'parameters': self.parameters.tolist()}, file, indent=2)
+        with (directory / 'summary.csv').open('w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=self.Columns)
+            writer.writeheader()
+            num_snapshots = 0
+            while True:
+                writer.writerows(self.summary())
+                self.snapshot(directory)
+                num_snapshots += 1
+                if verbose:
+                    print(f"Generation {self.generation}/{generations}", flush=True)
+                if self.generation >= generations:
+                    break
+                self.advance(min(every, generations - self.generation))
+        return num_snapshots
+
+    @staticmethod
+    def load(directory: pathlib.Path) -> Tuple[List[Dict], Dict[int, Dict[str, np.ndarray]]]:
+        directory = pathlib.Path(directory)
+        with (directory / 'summary.csv').open(newline='') as file:
+            rows = [{name: (int if name in ('generation', 'index') else float)(value) for name, value in row.items()}
+                    for row in csv.DictReader(file)]
+        snapshots = {}
+        for path in sorted(directory.glob('snapshot-*.npz')):
+            with np.load(path) as snapshot:
+                snapshots[int(snapshot['generation'])] = dict(snapshot)
+        return rows, snapshots
+
+
+def main(arguments: List[str]=None) -> int:
+    parser = argparse.ArgumentParser(description="Gray-Scott (f, k) parameter sweep")
+    parser.add_argument('directory', help="output directory for snapshots and summary statistics")
+    parser.add_argument('--f', type=float, nargs=3, default=[0.010, 0.070, 7], metavar=('MIN', 'MAX', 'NUM'),
+                        help="feed rate range")
+    parser.add_argument('--k', type=float, nargs=3, default=[0.040, 0.070, 7], metavar=('MIN', 'MAX', 'NUM'),
+                        help="kill rate range")
+    parser.add_argument('--cu', type=float, default=0.16)
+    parser.add_argument('--cv', type=float, default=0.08)
+    parser.add_argument('--size', type=int, nargs=2, default=[128, 128])
+    parser.add_argument('--generations', type=int, default=10000)
+    parser.add_argument('--every', type=int, default=1000, help="generations between snapshots")
+    args = parser.parse_args(arguments)
+
+    fs = np.linspace(args.f[0], args.f[1], int(args.f[2]))
+    ks = np.linspace(args.k[0], args.k[1], int(args.k[2]))
+    sweep = GrayScottSweep(tuple(args.size), GrayScottSweep.grid(fs, ks, args.cu, args.cv))
+    num_snapshots = sweep.run(args.directory, args.generations, args.every, verbose=True)
+    print(f"Wrote {num_snapshots} snapshots of {len(sweep.parameters)} simulations into {args.directory}")
+    return 0
+
+
+# region Unit Tests
+
+
+class TestGrayScottSweep(unittest.TestCase):
+
+    def test_slices(self):
+        parameters = GrayScottSweep.grid([0.035, 0.062], [0.060, 0.065])
+        sweep = GrayScottSweep((48, 64), parameters)
+        diffusions = []
+        for index, coeffs in enumerate(parameters):
+            diffusion = GrayScottDiffusion((48, 64), coeffs=coeffs, fused=True)
+            diffusion.u[:], diffusion.v[:] = sweep.u[index], sweep.v[index]
+            diffusions.append(diffusion)
+        sweep.advance(300)
+        for index, diffusion in enumerate(diffusions):
+            diffusion.advance(300)
+            np.testing.assert_allclose(sweep.u[index], diffusion.u, atol=1e-5)
+            np.testing.assert_allclose(sweep.v[index], diffusion.v, atol=1e-5)
+
+    def test_run(self):
+        with tempfile.TemporaryDirectory() as directory:
+            sweep = GrayScottSweep((32, 32), GrayScottSweep.grid([0.02, 0.04, 0.06], [0.06]))
+            self.assertEqual(sweep.run(directory, generations=250, every=100), 4)
+            rows, snapshots = GrayScottSweep.load(directory)
+            self.assertEqual(len(rows), 3 * 4)
+            self.assertEqual(sorted(snapshots), [0, 100, 200, 250])
+            self.assertEqual(snapshots[250]['v'].shape, (3, 32, 32))
+            for row in rows[-3:]:
+                index = row['index']
+                self.assertAlmostEqual(row['mean'], sweep.v[index].mean(), places=5)
+                self.assertEqual(row['f'], sweep.parameters[index, 2])
+
+    def test_defaults(self):
+        sweep = GrayScottSweep((32, 32))
+        np.testing.assert_array_equal(sweep.parameters, [GrayScottDiffusion.Coeffs])
+        sweep.advance(10)
+        self.assertEqual((sweep.generation, sweep.v.shape), (10, (1, 32, 32)))
+
+
+# endregion
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+import unittest
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from life import GameOfLife
+
+
+class TiledGameOfLife(GameOfLife):
+
+    Dense = 0.25
+    fields = None
+
+    def __init__(self, size: tuple=(400, 400), fill_rate: int=0.50, rule: str='B3/S23', history: bool=False,
+                 tile: int=32):
+        self.rulestring = rule
+        self.rule, self.states = self.compile(rule)
+        if self.states > 2:
+            raise ValueError(f"{type(self).__name__} doesn't support multi-state rule {rule!r}")
+        self.tile = tile
+        self.tiles = (-(-size[0] // tile), -(-size[1] // tile))
+        self.padded = np.zeros(shape=(self.tiles[0] * tile + 2, self.tiles[1] * tile + 2), dtype=np.uint8)
+        self.world = self.padded[1:size[0] + 1, 1:size[1] + 1]
+        self.world[:] = np.random.random(size=size) < fill_rate
+        self.visualization = 255 * np.ones(shape=size, dtype=np.uint8)
+
+        interior = np.zeros_like(self.padded)
+        interior[2:size[0], 2:size[1]] = 1
+        self.windows = sliding_window_view(self.padded, (tile + 2, tile + 2))[::tile, ::tile]
+        self.mask = interior[1:-1, 1:-1]
+        self.cells = self.blocks(self.padded[1:-1, 1:-1])
+        self.interior = self.blocks(self.mask)
+        self.neighbors = np.zeros(shape=self.mask.shape, dtype=np.uint8)
+        self.index = np.zeros(shape=self.mask.shape, dtype=np.uint8)
+        self.lookup = np.zeros(shape=self.mask.shape, dtype=np.uint32)
+        self.following = np.zeros(shape=self.mask.shape, dtype=np.uint8)
+        self.stamps = np.zeros(shape=self.mask.shape, dtype=np.uint32) if history else None
+        self.seen = self.stamps[:size[0], :size[1]] if history else None
+        self.generation = 0
+        self.active = np.ones(shape=self.tiles, dtype=bool)
+        self.active_tiles = self.active.sum()
+
+    def blocks(self, cells: np.ndarray) -> np.ndarray:
+        return cells.reshape(self.tiles[0], self.tile, self.tiles[1], self.tile)
+
+    @property
+    def activity(self) -> float:
+        return self.active_tiles / self.active.size
+
+    def touch(self, rows=slice(None), columns=slice(None)):
+        touched = []
+        for axis, cells in enumerate((rows, columns)):
+            marks = np.zeros(shape=self.tiles[axis] * self.tile, dtype=bool)
+            marks[:self.world.shape[axis]][cells] = True
+            touched.append(marks.reshape(self.tiles[axis], self.tile).any(axis=1))
+        self.wake(np.outer(*touched))
+
+    def wake(self, changed: np.ndarray):
+        dilated = changed.copy()
+        dilated[1:, :] |= changed[:-1, :]
+        dilated[:-1, :] |= changed[1:, :]
+        self.active |= dilated
+        self.active[:, 1:] |= dilated[:, :-1]
+        self.active[:, :-1] |= dilated[:, 1:]
+
+    def tick(self):
+        self.active_tiles = self.active.sum()
+        self.generation += 1
+        if self.active_tiles == 0:
+            return
+        if self.activity > self.Dense:
+            changed = self.sweep()
+        else:
+            changed = np.zeros_like(self.active)
+            rows, columns = np.nonzero(self.active)
+            changed[rows, columns] = self.update(rows, columns)
+        self.active[:] = False
+        self.wake(changed)
+
+    def update(self, rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        blocks = self.windows[rows, columns]
+        neighbors = blocks[:,  :-2,  :-2] + blocks[:,  :-2, 1:-1]
+        neighbors += blocks[:,  :-2, 2:  ]
+        neighbors += blocks[:, 1:-1,  :-2]
+        neighbors += blocks[:, 1:-1, 2:  ]
+        neighbors += blocks[:, 2:  ,  :-2]
+        neighbors += blocks[:, 2:  , 1:-1]
+        neighbors += blocks[:, 2:  , 2:  ]
+        current = blocks[:, 1:-1, 1:-1]
+        index = (neighbors << 1) | current
+        following = np.right_shift(self.rule, index, dtype=np.uint32).astype(np.uint8) & 1
+        following &= self.interior[rows, :, columns, :]
+        self.cells[rows, :, columns, :] = following
+        if self.stamps is None:
+            return np.any(following != current, axis=(1, 2))
+        seen = self.blocks(self.stamps)[rows, :, columns, :]
+        if self.generation > 1:
+            np.copyto(seen, self.generation - 1 + self.Fading, where=current.view(bool))
+        np.copyto(seen, self.generation + self.Fading, where=following.view(bool))
+        self.blocks(self.stamps)[rows, :, columns, :] = seen
+        return np.any(following != current, axis=(1, 2))
+
+    def sweep(self) -> np.ndarray:
+        neighbors, world = self.neighbors, self.padded
+        np.add(world[  :-2,  :-2], world[  :-2, +1:-1], out=neighbors)
+        np.add(neighbors, world[  :-2, +2:  ], out=neighbors)
+        np.add(neighbors, world[+1:-1,  :-2], out=neighbors)
+        np.add(neighbors, world[+1:-1, +2:  ], out=neighbors)
+        np.add(neighbors, world[+2:  ,  :-2], out=neighbors)
+        np.add(neighbors, world[+2:  , +1:-1], out=neighbors)
+        np.add(neighbors, world[+2:  , +2:  ], out=neighbors)
+        current = world[+1:-1, +1:-1]
+        np.left_shift(neighbors, 1, out=self.index)
+        np.bitwise_or(self.index, current, out=self.index)
+        np.right_shift(self.rule, self.index, out=self.lookup)
+        np.bitwise_and(self.lookup, self.mask, out=self.following, casting='unsafe')
+        np.not_equal(self.following, current, out=self.index, casting='unsafe')
+        changed = self.blocks(self.index).any(axis=(1, 3))
+        if self.stamps is None:
+            np.copyto(current, self.following)
+            return changed
+        if self.generation > 1:
+            np.copyto(self.stamps, self.generation - 1 + self.Fading, where=current.view(bool))
+        np.copyto(current, self.following)
+        np.copyto(self.stamps, self.generation + self.Fading, where=current.view(bool))
+        return changed
+
+
+# region Unit Tests
+
+
+class TestTiledGameOfLife(unittest.TestCase):
+
+    def test_identical(self):
+        for size, tile, history in [((100, 100), 32, True), ((97, 150), 16, False), ((64, 64), 64, True)]:
+            game = GameOfLife(size, fill_rate=0.30, history=history)
+            tiled = TiledGameOfLife(size, history=history, tile=tile)
+            tiled.world[:] = game.world
+            for generation in range(100):
+                game.tick()
+                tiled.tick()
+                np.testing.assert_array_equal(tiled.world, game.world)
+            np.testing.assert_array_equal(tiled.visualize(), game.visualize())
+        game = GameOfLife((80, 90), fill_rate=0.30, rule='B36/S23')
+        tiled = TiledGameOfLife((80, 90), rule='B36/S23', tile=16)
+        tiled.world[:] = game.world
+        game.advance(50)
+        tiled.advance(50)
+        np.testing.assert_array_equal(tiled.world, game.world)
+
+    def test_sparse(self):
+        tiled = TiledGameOfLife((256, 256), fill_rate=0.0, tile=8)
+        tiled.world[100:103, 100:103] = [[0, 1, 0], [0, 0, 1], [1, 1, 1]]
+        tiled.tick()
+        self.assertEqual(tiled.active_tiles, tiled.active.size)
+        for generation in range(40):
+            tiled.tick()
+            self.assertLessEqual(tiled.active_tiles, 16)
+        self.assertLess(tiled.activity, 0.05)
+        self.assertEqual(tiled.world.sum(), 5)
+
+    def test_touch(self):
+        glider = [[0, 1, 0], [0, 0, 1], [1, 1, 1]]
+        tiled = TiledGameOfLife((128, 128), fill_rate=0.0, tile=8)
+        tiled.world[60:62, 20:22] = 1
+        tiled.advance(2)
+        self.assertFalse(tiled.active.any())
+        tiled.world[40:43, 40:43] = glider
+        tiled.tick()
+        self.assertEqual(tiled.world[40:43, 40:43].tolist(), glider)
+        tiled.touch(slice(40, 43), slice(40, 43))
+        self.assertEqual(tiled.active.sum(), 9)
+        game = GameOfLife((128, 128), fill_rate=0.0)
+        game.world[:] = tiled.world
+        tiled.advance(40)
+        game.advance(40)
+        np.testing.assert_array_equal(tiled.world, game.world)
+        self.assertEqual(tiled.world[50:53, 50:53].tolist(), glider)
+        tiled.touch(np.array([0, 127]), np.array([127]))
+        self.assertTrue(tiled.active[0, -1] and tiled.active[-1, -1] and not tiled.active[0, 0])
+
+
+# endregion
@@ -1,24 +1,37 @@
-from PySide2.QtWidgets import QWidget, QComboBox, QGraphicsScene, QGraphicsView, QVBoxLayout, QFrame, QSizePolicy
+from PySide2.QtWidgets import QWidget, QComboBox, QGraphicsScene, QGraphicsView, QVBoxLayout, QHBoxLayout, QFrame, \
+    QSizePolicy, QPushButton
 from PySide2.QtCore import Qt, QSize, QTimer
-from PySide2.QtGui import QImage, QPixmap, QResizeEvent
+from PySide2.QtGui import QImage, QPixmap, QResizeEvent, QCloseEvent
 import random
 
 from life import GameOfLife, GrayScottDiffusion
+from packed import PackedGameOfLife
+from tiled import TiledGameOfLife
+from spectral import SpectralGrayScottDiffusion
+from simulation import Frames, Simulation
 
 
 class QGameOfLife(QWidget):
 
     Games = {
-        "Game of Life": (GameOfLife, {'fill_rate': 0.50}),
-        "Bacteria": (GrayScottDiffusion, {'coeffs': (0.16, 0.08, 0.035, 0.065)}),
-        "Coral": (GrayScottDiffusion, {'coeffs': (0.16, 0.08, 0.062, 0.062)}),
-        "Fingerprint": (GrayScottDiffusion, {'coeffs': (0.19, 0.05, 0.060, 0.062)}),
-        "Spirals": (GrayScottDiffusion, {'coeffs': (0.10, 0.10, 0.018, 0.050)}),
-        "Unstable": (GrayScottDiffusion, {'coeffs': (0.16, 0.08, 0.020, 0.055)}),
-        "Worms": (GrayScottDiffusion, {'coeffs': (0.16, 0.08, 0.050, 0.065)}),
-        "Zebrafish": (GrayScottDiffusion, {'coeffs': (0.16, 0.08, 0.035, 0.060)}),
+        "Game of Life": (GameOfLife, {'fill_rate': 0.50, 'history': True}),
+        "Game of Life (Packed)": (PackedGameOfLife, {'fill_rate': 0.50}),
+        "Game of Life (Tiled)": (TiledGameOfLife, {'fill_rate': 0.50, 'history': True}),
+        "HighLife": (GameOfLife, {'fill_rate': 0.50, 'rule': 'B36/S23', 'history': True}),
+        "Day & Night": (GameOfLife, {'fill_rate': 0.50, 'rule': 'B3678/S34678', 'history': True}),
+        "Brian's Brain": (GameOfLife, {'fill_rate': 0.20, 'rule': 'B2/S/C3', 'history': True}),
+        "Bacteria": (GrayScottDiffusion, {'coeffs': (0.16, 0.08, 0.035, 0.065), 'fused': True}),
+        "Coral": (GrayScottDiffusion, {'coeffs': (0.16, 0.08, 0.062, 0.062), 'fused': True}),
+        "Fingerprint": (GrayScottDiffusion, {'coeffs': (0.19, 0.05, 0.060, 0.062), 'fused': True}),
+        "Spirals": (GrayScottDiffusion, {'coeffs': (0.10, 0.10, 0.018, 0.050), 'fused': True}),
+        "Unstable": (GrayScottDiffusion, {'coeffs': (0.16, 0.08, 0.020, 0.055), 'fused': True}),
+        "Worms": (GrayScottDiffusion, {'coeffs': (0.16, 0.08, 0.050, 0.065), 'fused': True}),
+        "Worms (Spectral)": (SpectralGrayScottDiffusion, {'coeffs': (0.16, 0.08, 0.050, 0.065)}),
+        "Zebrafish": (GrayScottDiffusion, {'coeffs': (0.16, 0.08, 0.035, 0.060), 'fused': True}),
     }
 
+    Rate = 60
+
     def __init__(self, size=(400, 400)):
         super(QGameOfLife, self).__init__()
         self.size = size
@@ -32,10 +45,17 @@ class QGameOfLife(QWidget):
         self.layout().setSpacing(0)
         self.layout().setContentsMargins(0, 0, 0, 0)
 
+        controls = QHBoxLayout()
         self.comboBox = QComboBox()
         self.comboBox.addItems([*QGameOfLife.Games.keys()])
         self.comboBox.currentTextChanged.connect(self.select)
-        self.layout().addWidget(self.comboBox)
+        self.comboBox.setSizePolicy(QSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed))
+        controls.addWidget(self.comboBox)
+        self.pauseButton = QPushButton(self.tr("Pause"))
+        self.pauseButton.setCheckable(True)
+        self.pauseButton.toggled.connect(self.pause)
+        controls.addWidget(self.pauseButton)
+        self.layout().addLayout(controls)
 
         self.scene = QGraphicsScene()
         self.view = QGraphicsView(self.scene)
@@ -45,29 +65,49 @@ class QGameOfLife(QWidget):
         self.view.setFrameShape(QFrame.NoFrame)
         self.layout().addWidget(self.view)
 
-        self.item = None
+        self.frames = Frames(self.size)
+        self.images = [QImage(frame.data, frame.shape[1], frame.shape[0], frame.strides[0], QImage.Format_Grayscale8)
+                       for frame in self.frames.buffers]
+        self.pixmap = QPixmap(self.size[1], self.size[0])
+        self.item = self.scene.addPixmap(self.pixmap)
+        self.simulation = None
         self.timer = QTimer()
-        self.timer.setInterval(10)
+        self.timer.setInterval(1000 // QGameOfLife.Rate)
         self.timer.timeout.connect(self.tick)
         initialGame = random.choice([*QGameOfLife.Games.keys()])
         self.select(initialGame)
         self.view.fitInView(self.item, Qt.KeepAspectRatioByExpanding)
         self.comboBox.setCurrentText(initialGame)
+        self.timer.start()
 
     def select(self, name: str):
-        self.timer.stop()
         Game, args = QGameOfLife.Games[name]
         self.game = Game(self.size, **args)
-        self.tick()
-        self.timer.start()
+        if self.simulation is None:
+            self.simulation = Simulation(self.game, self.frames)
+            self.simulation.start()
+        else:
+            self.simulation.switch(self.game)
+
+    def pause(self, paused: bool):
+        if paused:
+            self.simulation.pause()
+        else:
+            self.simulation.resume()
 
     def tick(self):
-        self.game.tick()
-        bitmap = self.game.visualize()
-        image = QImage(bitmap.data, bitmap.shape[1], bitmap.shape[0], QImage.Format_Grayscale8)
-        self.scene.removeItem(self.item)
-        pixmap = QPixmap.fromImage(image)
-        self.item = self.scene.addPixmap(pixmap)
+        frame = self.frames.consume()
+        if frame is None:
+            return
+        index, bitmap, generation = frame
+        self.pixmap.convertFromImage(self.images[index])
+        self.item.setPixmap(self.pixmap)
+
+    def closeEvent(self, event: QCloseEvent):
+        self.timer.stop()
+        self.simulation.stop()
+        self.simulation.join()
+        super(QGameOfLife, self).closeEvent(event)
 
     def resizeEvent(self, event: QResizeEvent):
         self.view.fitInView(self.item, Qt.KeepAspectRatioByExpanding)
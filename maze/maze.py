@@ -1,7 +1,9 @@
 from PySide2.QtCore import Qt, QSize, QPoint, Property, QPropertyAnimation, QEasingCurve
 from PySide2.QtGui import QPainter, QPen, QPalette, QPaintEvent, QMouseEvent, QResizeEvent
 from PySide2.QtWidgets import QWidget, QMessageBox
-import random
+import numpy as np
+
+from model import Maze
 
 
 class QMaze(QWidget):
@@ -10,8 +12,20 @@ class QMaze(QWidget):
         def __init__(self, maze: 'QMaze', row: int, column: int):
             self.row, self.column = row, column
             self.maze = maze
-            self.neighbors = []
-            self.links = []
+
+        def __eq__(self, other: 'QMaze.QNode') -> bool:
+            return isinstance(other, QMaze.QNode) and (self.row, self.column) == (other.row, other.column)
+
+        def __hash__(self) -> int:
+            return hash((self.row, self.column))
+
+        @property
+        def neighbors(self) -> list:
+            return [QMaze.QNode(self.maze, *cell) for cell in self.maze.model.neighbors((self.row, self.column))]
+
+        @property
+        def links(self) -> list:
+            return [QMaze.QNode(self.maze, *cell) for cell in self.maze.model.links((self.row, self.column))]
 
         @property
         def point(self) -> QPoint:
@@ -38,7 +52,7 @@ class QMaze(QWidget):
     def __init__(self, size: int):
         super(QMaze, self).__init__()
         self.size = size
-        self.nodes = None
+        self.model = None
         self.animation = None
         self.startNode = None
         self.finishNode = None
@@ -60,45 +74,14 @@ class QMaze(QWidget):
     player = Property(QPoint, getPlayer, setPlayer)
 
     def initMaze(self):
-        self.nodes = {}
-        for row in range(self.size):
-            for column in range(self.size):
-                self.nodes[row, column] = QMaze.QNode(self, row, column)
-
-        for (row, column), node in self.nodes.items():
-            if 0 < row:
-                node.neighbors.append(self.nodes[row - 1, column])
-            if row < self.size - 1:
-                node.neighbors.append(self.nodes[row + 1, column])
-            if 0 < column:
-                node.neighbors.append(self.nodes[row, column - 1])
-            if column < self.size - 1:
-                node.neighbors.append(self.nodes[row, column + 1])
-
-        self.startNode = self.nodes[0, 0]
+        self.model = Maze((self.size, self.size))
+        self.startNode = QMaze.QNode(self, 0, 0)
         self.finishNode = self.generateMaze(self.startNode)
         self.playerNode = self.startNode
         self.player = self.playerNode.point
 
     def generateMaze(self, start: 'QMaze.QNode') -> 'QMaze.QNode':
-        generated = set()
-        deepestNode, deepestRecursion = start, -1
-
-        def generateNode(node, recursion=0):
-            nonlocal generated, deepestNode, deepestRecursion
-            if node in generated:
-                return
-            generated.add(node)
-            for neighbor in random.sample(node.neighbors, len(node.neighbors)):
-                if neighbor not in generated:
-                    node.links.append(neighbor)
-                    neighbor.links.append(node)
-                    generateNode(neighbor, recursion + 1)
-            if recursion > deepestRecursion:
-                deepestNode, deepestRecursion = node, recursion
-
-        generateNode(start)
-        return deepestNode
+        return QMaze.QNode(self, *self.model.generate((start.row, start.column)))
 
     def initUI(self):
         self.setWindowTitle(self.tr("Maze"))
@@ -132,26 +115,19 @@ class QMaze(QWidget):
         painter.setBackgroundMode(Qt.TransparentMode)
         painter.setRenderHint(QPainter.Antialiasing)
 
-        if self.nodes is not None:
-            painted = set()
-
-            def paintNode(node):
-                nonlocal painter, painted
-                if node in painted:
-                    return
-                painted.add(node)
-                for link in node.links:
-                    if link not in painted:
-                        painter.drawLine(node.point, link.point)
-                        paintNode(link)
-
+        if self.model is not None:
             color = self.palette().color(QPalette.Dark)
             pen.setColor(color)
             pen.setWidth(0.50 * self.paintStep)
             painter.setPen(pen)
-            for node in self.nodes.values():
-                if paintEvent.region().contains(node.point):
-                    paintNode(node)
+            for direction in (Maze.South, Maze.East):
+                deltaRow, deltaColumn = Maze.Directions[direction]
+                rows, columns = np.nonzero((self.model.walls & direction) == 0)
+                for row, column in zip(rows.tolist(), columns.tolist()):
+                    point = QPoint(column * self.paintStep, row * self.paintStep)
+                    link = QPoint((column + deltaColumn) * self.paintStep, (row + deltaRow) * self.paintStep)
+                    if paintEvent.region().contains(point) or paintEvent.region().contains(link):
+                        painter.drawLine(point, link)
 
         if self.startNode is not None:
             color = self.palette().color(QPalette.Dark)
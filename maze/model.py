@@ -0,0 +1,196 @@
+import random
+import itertools
+import unittest
+import numpy as np
+from typing import Iterator, List, Tuple
+
+Cell = Tuple[int, int]
+
+
+class Maze:
+
+    North, South, West, East = 1, 2, 4, 8
+    Closed = North | South | West | East
+    Directions = {North: (-1, 0), South: (+1, 0), West: (0, -1), East: (0, +1)}
+    Deltas = {delta: direction for direction, delta in Directions.items()}
+    Opposite = {North: South, South: North, West: East, East: West}
+
+    def __init__(self, size: tuple=(10, 10)):
+        self.shape = tuple(size)
+        self.walls = np.full(shape=self.shape, fill_value=self.Closed, dtype=np.uint8)
+        self.start, self.finish = (0, 0), (0, 0)
+
+    def inside(self, cell: Cell) -> bool:
+        return 0 <= cell[0] < self.shape[0] and 0 <= cell[1] < self.shape[1]
+
+    def neighbors(self, cell: Cell) -> List[Cell]:
+        row, column = cell
+        candidates = [(row + delta_row, column + delta_column) for delta_row, delta_column in self.Directions.values()]
+        return [candidate for candidate in candidates if self.inside(candidate)]
+
+    def links(self, cell: Cell) -> List[Cell]:
+        row, column = cell
+        walls = int(self.walls[row, column])
+        return [(row + delta_row, column + delta_column)
+                for direction, (delta_row, delta_column) in self.Directions.items() if not walls & direction]
+
+    def linked(self, cell: Cell, other: Cell) -> bool:
+        direction = self.Deltas.get((other[0] - cell[0], other[1] - cell[1]))
+        return direction is not None and not self.walls[cell] & direction
+
+    def link(self, cell: Cell, other: Cell):
+        direction = self.Deltas[other[0] - cell[0], other[1] - cell[1]]
+        self.walls[cell] &= ~direction & self.Closed
+        self.walls[other] &= ~self.Opposite[direction] & self.Closed
+
+    def generate(self, start: Cell=(0, 0), seed: int=None) -> Cell:
+        rows, columns = self.shape
+        uniform = random.Random(seed).random
+        closed, north, south, west, east = self.Closed, self.North, self.South, self.West, self.East
+        walls = bytearray([closed]) * (rows * columns)
+        first = start[0] * columns + start[1]
+        stack, deepest, deepestDepth = [first], first, 1
+        push, pop = stack.append, stack.pop
+        while stack:
+            cell = stack[-1]
+            row, column = divmod(cell, columns)
+            candidates = []
+            if row > 0 and walls[cell - columns] == closed:
+                candidates.append((cell - columns, north, south))
+            if row < rows - 1 and walls[cell + columns] == closed:
+                candidates.append((cell + columns, south, north))
+            if column > 0 and walls[cell - 1] == closed:
+                candidates.append((cell - 1, west, east))
+            if column < columns - 1 and walls[cell + 1] == closed:
+                candidates.append((cell + 1, east, west))
+            if not candidates:
+                pop()
+                continue
+            neighbor, direction, opposite = candidates[int(uniform() * len(candidates))]
+            walls[cell] ^= direction
+            walls[neighbor] ^= opposite
+            push(neighbor)
+            if len(stack) > deepestDepth:
+                deepest, deepestDepth = neighbor, len(stack)
+        self.walls = np.frombuffer(walls, dtype=np.uint8).reshape(self.shape)
+        self.start, self.finish = start, divmod(deepest, columns)
+        return self.finish
+
+
+def eller(width: int, height: int=None, seed: int=None) -> Iterator[np.ndarray]:
+    uniform = random.Random(seed).random
+    labels, fresh, row = [None] * width, 0, 0
+    north, parents = bytearray([Maze.North]) * width, {}
+
+    def find(label: int) -> int:
+        while parents[label] != label:
+            parents[label] = parents[parents[label]]
+            label = parents[label]
+        return label
+
+    while height is None or row < height:
+        last = height is not None and row == height - 1
+        for column in range(width):
+            if labels[column] is None:
+                labels[column], fresh = fresh, fresh + 1
+        parents = {label: label for label in labels}
+        walls = bytearray(north)
+        for column in range(width):
+            walls[column] |= Maze.South | Maze.West | Maze.East
+        for column in range(width - 1):
+            left, right = find(labels[column]), find(labels[column + 1])
+            if left != right and (last or uniform() < 0.5):
+                parents[right] = left
+                walls[column] ^= Maze.East
+                walls[column + 1] ^= Maze.West
+        labels = [find(label) for label in labels]
+
+        north = bytearray([Maze.North]) * width
+        if not last:
+            members, chosen, descending = {}, {}, set()
+            for column, label in enumerate(labels):
+                members[label] = members.get(label, 0) + 1
+                if uniform() * members[label] < 1:
+                    chosen[label] = column
+                if uniform() < 0.5:
+                    descending.add(column)
+            descending.update(chosen.values())
+            for column in descending:
+                walls[column] ^= Maze.South
+                north[column] = 0
+            renumbered = {label: index for index, label in enumerate(dict.fromkeys(labels))}
+            labels = [renumbered[label] if column in descending else None for column, label in enumerate(labels)]
+            fresh = len(renumbered)
+        yield np.frombuffer(walls, dtype=np.uint8)
+        row += 1
+
+
+# region Unit Tests
+
+
+class TestMaze(unittest.TestCase):
+
+    @staticmethod
+    def distances(maze: Maze, start: Cell) -> dict:
+        distances, frontier = {start: 0}, [start]
+        while frontier:
+            cell = frontier.pop()
+            for link in maze.links(cell):
+                if link not in distances:
+                    distances[link] = distances[cell] + 1
+                    frontier.append(link)
+        return distances
+
+    def test_link(self):
+        maze = Maze((3, 4))
+        maze.link((1, 1), (1, 2))
+        maze.link((1, 1), (0, 1))
+        self.assertEqual(maze.walls[1, 1], Maze.South | Maze.West)
+        self.assertEqual(maze.walls[1, 2], Maze.Closed & ~Maze.West)
+        self.assertEqual(sorted(maze.links((1, 1))), [(0, 1), (1, 2)])
+        self.assertTrue(maze.linked((0, 1), (1, 1)))
+        self.assertFalse(maze.linked((0, 1), (1, 2)))
+        self.assertEqual(sorted(maze.neighbors((0, 0))), [(0, 1), (1, 0)])
+
+    def test_generate(self):
+        maze = Maze((20, 30))
+        finish = maze.generate()
+        self.assertEqual(maze.walls.dtype, np.uint8)
+        self.assertEqual(maze.walls.nbytes, 20 * 30)
+        openings = sum(len(maze.links((row, column))) for row in range(20) for column in range(30))
+        self.assertEqual(openings, 2 * (20 * 30 - 1))
+        distances = self.distances(maze, maze.start)
+        self.assertEqual(len(distances), 20 * 30)
+        self.assertEqual((maze.start, maze.finish), ((0, 0), finish))
+        self.assertTrue(np.all(maze.walls[0] & Maze.North) and np.all(maze.walls[-1] & Maze.South))
+        self.assertTrue(np.all(maze.walls[:, 0] & Maze.West) and np.all(maze.walls[:, -1] & Maze.East))
+
+    def test_iterative(self):
+        maze, other = Maze((300, 300)), Maze((300, 300))
+        self.assertEqual(maze.generate((150, 150), seed=7), other.generate((150, 150), seed=7))
+        np.testing.assert_array_equal(maze.walls, other.walls)
+        distances = self.distances(maze, (150, 150))
+        self.assertEqual(len(distances), 300 * 300)
+        self.assertEqual(distances[maze.finish], max(distances.values()))
+        openings = sum(np.count_nonzero(~maze.walls & direction) for direction in Maze.Directions)
+        self.assertEqual(openings, 2 * (300 * 300 - 1))
+
+    def test_eller(self):
+        maze = Maze((120, 80))
+        maze.walls = np.stack(list(eller(80, 120, seed=3)))
+        np.testing.assert_array_equal(maze.walls, np.stack(list(eller(80, 120, seed=3))))
+        self.assertEqual(maze.walls.dtype, np.uint8)
+        self.assertTrue(np.all(maze.walls[0] & Maze.North) and np.all(maze.walls[-1] & Maze.South))
+        self.assertTrue(np.all(maze.walls[:, 0] & Maze.West) and np.all(maze.walls[:, -1] & Maze.East))
+        np.testing.assert_array_equal((maze.walls[:-1] & Maze.South) != 0, (maze.walls[1:] & Maze.North) != 0)
+        np.testing.assert_array_equal((maze.walls[:, :-1] & Maze.East) != 0, (maze.walls[:, 1:] & Maze.West) != 0)
+        openings = sum(np.count_nonzero(~maze.walls & direction) for direction in Maze.Directions)
+        self.assertEqual(openings, 2 * (120 * 80 - 1))
+        self.assertEqual(len(self.distances(maze, (0, 0))), 120 * 80)
+
+        rows = eller(64, seed=5)
+        for row in itertools.islice(rows, 5000):
+            self.assertEqual(row.shape, (64,))
+
+
+# endregion